@@ -1,47 +1,120 @@
-import datetime
-
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Request
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
+from app.core.dependencies import is_admin
 from app.core.exceptions import BusinessException
+from app.core.response_cache import response_cache
+from app.core.tabular import export_response, iter_records
 from app.crud import attendancedao
 from app.schemas.common import APIResponse
-from config.database import get_db
-from app.schemas.attendance import Day, DayCreate, DayInDBBase, DayQuery, DayUpdate
+from app.schemas.token import Principal
+from config.config import EXPORT_BATCH_SIZE, IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS
+from config.database import get_async_db
+from app.schemas.attendance import Day, DayCreate, DayInDBBase, DayQuery, DayUpdate, ImportResult, ImportRowError, current_month, parse_month, shift_month
 
 
 router = APIRouter()
 
 
 @router.post("/list", response_model=APIResponse[List[Day]], summary="获取出勤记录")
-def read_users(
+async def read_users(
+	request: Request,
 	params: DayQuery,
-	db: Session = Depends(get_db),
+	db: AsyncSession = Depends(get_async_db),
 ):
 	"""获取出勤记录（分页）"""
 	if params.pageSize > 500:
 		raise BusinessException(msg="每页最大记录数不能超过500", code=400)
-	if params.month is None or params.month == '':
-		params.month =datetime.date.today().strftime("%Y-%m")
+	month = params.month or current_month()
+	start_month = params.startMonth or shift_month(month, -11)
+	if start_month > month:
+		raise BusinessException(msg="起始月份不能晚于截止月份", code=400)
+
+	async def build() -> APIResponse:
+		ret = await attendancedao.get_days_async(
+			db, current=params.current, pageSize=params.pageSize,
+			month=month, start_month=start_month, with_total=params.withTotal
+		)
+		return APIResponse(data=ret.get("data"), total=ret.get("total"))
 
-	ret = attendancedao.get_days(db, current=params.current, pageSize=params.pageSize,month = params.month)
-	return APIResponse(data=ret.get("data"), total=ret.get("total"))
+	return await response_cache.serve(
+		request, None, ("attendance",), build, schema=Day,
+		params=[params.current, params.pageSize, month, start_month, params.withTotal]
+	)
 
 @router.post("/add", response_model=APIResponse[List[Day]], summary="新增出勤记录")
-def read_users(
+async def read_users(
 	params: DayCreate,
-	db: Session = Depends(get_db),
+	db: AsyncSession = Depends(get_async_db),
 ):
 	"""新增出勤记录"""
-	ret = attendancedao.create_day(db, day=params)
+	ret = await attendancedao.create_day_async(db, day=params)
 	return APIResponse(data = [ret])
 
+@router.post("/import", response_model=APIResponse[ImportResult], summary="批量导入出勤记录")
+async def import_days(
+	request: Request,
+	allowPartial: bool = False,
+	db: AsyncSession = Depends(get_async_db),
+	current_user: Principal = Depends(is_admin)
+):
+	"""批量导入出勤记录（仅管理员）
+
+	请求体为JSON数组，或以text/csv、application/x-ndjson流式上传；
+	逐行按DayCreate校验，合法行按IMPORT_BATCH_SIZE分批插入，全部批次随请求事务一次提交。
+	存在校验失败的行时默认整体回滚，allowPartial=true时仅写入合法行。
+	"""
+	result = ImportResult()
+	batch = []
+	async for row, record, error in iter_records(request.headers.get("content-type"), request.stream()):
+		if error is None:
+			try:
+				batch.append(DayCreate(**record).dict())
+			except ValidationError as exc:
+				error = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+		if error is not None:
+			result.failed += 1
+			if len(result.errors) < IMPORT_MAX_ERRORS:
+				result.errors.append(ImportRowError(row=row, message=error))
+			continue
+		if len(batch) >= IMPORT_BATCH_SIZE:
+			# 整体导入时一旦出现失败行就只继续校验，不再写库
+			if allowPartial or not result.failed:
+				result.inserted += await attendancedao.insert_days_async(db, batch)
+			batch = []
+
+	if result.failed and not allowPartial:
+		await db.rollback()
+		result.inserted = 0
+		return APIResponse(success=False, data=result, errorCode=400, errorMessage="存在校验失败的行，未写入任何记录")
+	result.inserted += await attendancedao.insert_days_async(db, batch)
+	return APIResponse(data=result)
+
+@router.get("/export", summary="导出出勤记录")
+async def export_days(
+	format: str = "csv",
+	startMonth: Optional[str] = None,
+	month: Optional[str] = None,
+	current_user: Principal = Depends(is_admin)
+):
+	"""流式导出出勤记录（仅管理员），可按月份区间过滤，format为csv或ndjson"""
+	try:
+		start_month, end_month = parse_month(startMonth), parse_month(month)
+	except ValueError as exc:
+		raise BusinessException(msg=str(exc), code=400)
+	columns = [column.key for column in attendancedao.EXPORT_COLUMNS]
+	return export_response(
+		format, "attendance", columns,
+		lambda db: attendancedao.stream_days_async(db, EXPORT_BATCH_SIZE, start_month, end_month)
+	)
+
 @router.post("/del", response_model=APIResponse[List[Day]], summary="删除出勤记录")
-def read_users(
+async def read_users(
 	params: DayInDBBase,
-	db: Session = Depends(get_db),
+	db: AsyncSession = Depends(get_async_db),
 ):
 	"""新增出勤记录"""
-	attendancedao.delete_day(db, day_id=params.id)
+	await attendancedao.delete_day_async(db, day_id=params.id)
 	return APIResponse(data = [])
\ No newline at end of file
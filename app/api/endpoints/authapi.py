@@ -1,38 +1,57 @@
 from typing import Any, Dict
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.core.dependencies import get_current_user, get_user_permissions
+from app.core.dependencies import get_current_user, get_user_permissions_async
+from app.core.ratelimit import login_user_limit, rate_limiter
+from app.core.response_cache import response_cache
 from app.models.user import User
-from config.database import get_db
+from config.database import end_read_async, get_async_db
 from app.crud import userdao
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_and_update_password_async, create_access_token
 from app.schemas.common import APIResponse
 from app.schemas.usercheck import LoginRequest
 from app.core.exceptions import BusinessException
-from config.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from config.config import ACCESS_TOKEN_EXPIRE_MINUTES, JWT_STATELESS
 from app.models.user import User as DBUser
 
 router = APIRouter(tags=["auth"])
 
+async def limit_login_username(login_data: LoginRequest) -> LoginRequest:
+    """按用户名限流，在查库与bcrypt校验之前拒绝针对单个账号的高频尝试，返回解析后的登录参数"""
+    await rate_limiter.hit("login_user", login_data.username.lower(), login_user_limit)
+    return login_data
+
 @router.post("/token", response_model=APIResponse)
-def login_access_token(
-    login_data: LoginRequest,
-    db: Session = Depends(get_db)
+async def login_access_token(
+    login_data: LoginRequest = Depends(limit_login_username),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取访问令牌（JSON格式入参）"""
     # 验证用户
-    user = userdao.get_user_by_username(db, username=login_data.username)
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    # 读取主库：令牌中的角色与版本号需要是最新值
+    user = await userdao.get_user_by_username_async(db, username=login_data.username, primary=True)
+    if not user:
+        raise BusinessException(msg="用户名或密码错误", code=401)
+    # 排队等待bcrypt校验期间不占用连接
+    await end_read_async(db)
+    # bcrypt校验为CPU密集操作，放入独立进程池执行
+    valid, new_hash = await verify_and_update_password_async(login_data.password, user.hashed_password)
+    if not valid:
         raise BusinessException(msg="用户名或密码错误", code=401)
+    # 哈希成本与当前配置不一致时透明地重新生成并保存
+    if new_hash:
+        await userdao.update_password_hash_async(db, db_user=user, hashed_password=new_hash)
     
     # 生成令牌
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # 无状态模式下令牌内嵌角色等信息，后续请求无需查询用户表
+    claims = {"role": user.role, "username": user.username, "ver": user.token_version} if JWT_STATELESS else None
     access_token = create_access_token(
-        user.id, expires_delta=access_token_expires
+        user.id, expires_delta=access_token_expires, claims=claims
     )
     return APIResponse(
         data={
@@ -45,19 +64,23 @@ def login_access_token(
         }
     )
 @router.post("/currentUser", response_model=APIResponse)
-def read_users_me(
-	db: Session = Depends(get_db),
+async def read_users_me(
+	request: Request,
+	db: AsyncSession = Depends(get_async_db),
 	current_user: DBUser = Depends(get_current_user)
 ):
-    """获取当前登录用户信息"""
-    permissions = get_user_permissions(db, current_user)
-    return APIResponse(
-	    data={
-        "userid": current_user.id,
-        "name": current_user.username,
-		"avatar": current_user.avatar,
-        "email": current_user.email,
-        "role": current_user.role,
-        "is_active": current_user.is_active,
-        "permissions": permissions
-    })
\ No newline at end of file
+    """获取当前登录用户信息（按用户缓存，用户或角色权限变更后失效）"""
+    async def build() -> APIResponse:
+        permissions = await get_user_permissions_async(db, current_user)
+        return APIResponse(
+	        data={
+            "userid": current_user.id,
+            "name": current_user.username,
+		    "avatar": current_user.avatar,
+            "email": current_user.email,
+            "role": current_user.role,
+            "is_active": current_user.is_active,
+            "permissions": permissions
+        })
+
+    return await response_cache.serve(request, current_user, ("users", "roles"), build)
\ No newline at end of file
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+
+from app.core.dependencies import is_admin
+from app.core.logging import get_log_stats
+from app.core.security import password_hasher
+from app.schemas.token import Principal
+from app.schemas.common import APIResponse
+from config.database import get_pool_status
+
+router = APIRouter()
+
+@router.get("/pool", response_model=APIResponse, summary="数据库连接池状态")
+async def read_pool_status(
+    current_user: Principal = Depends(is_admin)
+):
+    """获取数据库连接池实时统计（仅管理员）"""
+    return APIResponse(data=get_pool_status())
+
+@router.get("/hasher", response_model=APIResponse, summary="密码哈希进程池状态")
+async def read_hasher_status(
+    current_user: Principal = Depends(is_admin)
+):
+    """获取密码哈希进程池的并发与排队统计（仅管理员）"""
+    return APIResponse(data=password_hasher.stats())
+
+@router.get("/logging", response_model=APIResponse, summary="访问日志队列状态")
+async def read_log_status(
+    current_user: Principal = Depends(is_admin)
+):
+    """获取访问日志队列长度与丢弃数量（仅管理员）"""
+    return APIResponse(data=get_log_stats())
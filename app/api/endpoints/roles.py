@@ -1,130 +1,161 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional
 
 from app.core.dependencies import check_permission
-from config.database import get_db
+from app.core.pagination import decode_cursor, next_cursor
+from app.core.response_cache import response_cache
+from config.database import get_async_db
 from app.schemas.role import Role, RoleCreate, RoleUpdate, Permission, PermissionCreate
 from app.crud.roledao import (
-    get_role, get_roles, get_role_by_name, create_role, update_role, delete_role,
-    get_permission, get_permissions, get_permission_by_code, create_permission,
-    add_permission_to_role, remove_permission_from_role
+    get_role_async, get_roles_async, get_role_by_name_async, create_role_async,
+    update_role_async, delete_role_async, get_permissions_async,
+    get_permission_by_code_async, create_permission_async,
+    add_permission_to_role_async, remove_permission_from_role_async
 )
-from app.models.user import User as DBUser
+from app.schemas.token import Principal
 
 router = APIRouter()
 
 # 角色管理
 @router.get("/roles", response_model=List[Role])
-def read_roles(
+async def read_roles(
+    request: Request,
+    response: Response,
     current: int = 0,
     pageSize: int = 100,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
-    """获取角色列表（需要角色管理权限）"""
-    roles = get_roles(db, current=current, pageSize=pageSize)
-    return roles
+    """获取角色列表（需要角色管理权限）
+
+    传入cursor时使用游标分页，下一页游标通过X-Next-Cursor响应头返回；偏移分页结果走响应缓存
+    """
+    if cursor is not None:
+        roles = await get_roles_async(db, pageSize=pageSize, after_id=decode_cursor(cursor) or 0)
+        response.headers["X-Next-Cursor"] = next_cursor(roles, pageSize) or ""
+        return roles
+    return await response_cache.serve(
+        request, current_user, ("roles",),
+        lambda: get_roles_async(db, current=current, pageSize=pageSize),
+        schema=Role, params=[current, pageSize]
+    )
 
 @router.post("/roles", response_model=Role, status_code=status.HTTP_201_CREATED)
-def create_new_role(
+async def create_new_role(
     role: RoleCreate,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
     """创建新角色（需要角色管理权限）"""
-    db_role = get_role_by_name(db, name=role.name)
+    # 唯一性预检查读取主库，副本延迟时不会漏判
+    db_role = await get_role_by_name_async(db, name=role.name, load=None, primary=True)
     if db_role:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="角色名称已存在"
         )
-    return create_role(db=db, role=role)
+    return await create_role_async(db=db, role=role)
 
 @router.get("/roles/{role_id}", response_model=Role)
-def read_role(
+async def read_role(
     role_id: int,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
     """获取指定角色信息（需要角色管理权限）"""
-    db_role = get_role(db, role_id=role_id)
+    db_role = await get_role_async(db, role_id=role_id)
     if db_role is None:
         raise HTTPException(status_code=404, detail="角色不存在")
     return db_role
 
 @router.put("/roles/{role_id}", response_model=Role)
-def update_existing_role(
+async def update_existing_role(
     role_id: int,
     role: RoleUpdate,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
     """更新角色信息（需要角色管理权限）"""
-    db_role = get_role(db, role_id=role_id)
+    # 加锁读取，之后的名称检查与更新都在主库上进行
+    db_role = await get_role_async(db, role_id=role_id, for_update=True)
     if db_role is None:
         raise HTTPException(status_code=404, detail="角色不存在")
     
     # 检查角色名是否已被占用
     if role.name:
-        existing_role = get_role_by_name(db, name=role.name)
+        existing_role = await get_role_by_name_async(db, name=role.name, load=None)
         if existing_role and existing_role.id != role_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="角色名称已存在"
             )
     
-    return update_role(db=db, db_role=db_role, role_update=role)
+    return await update_role_async(db=db, db_role=db_role, role_update=role)
 
 @router.delete("/roles/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_role(
+async def delete_existing_role(
     role_id: int,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
     """删除角色（需要角色管理权限）"""
-    success = delete_role(db, role_id=role_id)
+    success = await delete_role_async(db, role_id=role_id)
     if not success:
         raise HTTPException(status_code=404, detail="角色不存在")
     return None
 
 # 权限管理
 @router.get("/permissions", response_model=List[Permission])
-def read_permissions(
+async def read_permissions(
+    request: Request,
+    response: Response,
     current: int = 0,
     pageSize: int = 100,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
-    """获取权限列表（需要角色管理权限）"""
-    permissions = get_permissions(db, current=current, pageSize=pageSize)
-    return permissions
+    """获取权限列表（需要角色管理权限）
+
+    传入cursor时使用游标分页，下一页游标通过X-Next-Cursor响应头返回；偏移分页结果走响应缓存
+    """
+    if cursor is not None:
+        permissions = await get_permissions_async(db, pageSize=pageSize, after_id=decode_cursor(cursor) or 0)
+        response.headers["X-Next-Cursor"] = next_cursor(permissions, pageSize) or ""
+        return permissions
+    return await response_cache.serve(
+        request, current_user, ("roles",),
+        lambda: get_permissions_async(db, current=current, pageSize=pageSize),
+        schema=Permission, params=[current, pageSize]
+    )
 
 @router.post("/permissions", response_model=Permission, status_code=status.HTTP_201_CREATED)
-def create_new_permission(
+async def create_new_permission(
     permission: PermissionCreate,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
     """创建新权限（需要角色管理权限）"""
-    db_perm = get_permission_by_code(db, code=permission.code)
+    db_perm = await get_permission_by_code_async(db, code=permission.code, primary=True)
     if db_perm:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="权限标识已存在"
         )
-    return create_permission(db=db, permission=permission)
+    return await create_permission_async(db=db, permission=permission)
 
 # 角色权限关联
 @router.post("/roles/{role_id}/permissions/{permission_id}", response_model=Dict[str, Any])
-def assign_permission_to_role(
+async def assign_permission_to_role(
     role_id: int,
     permission_id: int,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
     """为角色分配权限（需要角色管理权限）"""
-    success = add_permission_to_role(db, role_id=role_id, permission_id=permission_id)
+    success = await add_permission_to_role_async(db, role_id=role_id, permission_id=permission_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -133,14 +164,14 @@ def assign_permission_to_role(
     return {"message": "权限分配成功", "role_id": role_id, "permission_id": permission_id}
 
 @router.delete("/roles/{role_id}/permissions/{permission_id}", response_model=Dict[str, Any])
-def remove_permission_from_role_endpoint(
+async def remove_permission_from_role_endpoint(
     role_id: int,
     permission_id: int,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(check_permission("role:manage"))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(check_permission("role:manage"))
 ):
     """从角色移除权限（需要角色管理权限）"""
-    success = remove_permission_from_role(db, role_id=role_id, permission_id=permission_id)
+    success = await remove_permission_from_role_async(db, role_id=role_id, permission_id=permission_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.crud import userdao
@@ -8,35 +8,63 @@ from app.schemas.usercheck import (
     UserQuery, UserGet, UserDelete
 )
 from app.schemas.common import APIResponse
-from config.database import get_db
-from app.core.dependencies import get_current_user, is_admin
+from config.database import get_async_db
+from app.core.dependencies import get_current_principal, is_admin
 from app.core.exceptions import BusinessException
-from app.models.user import User as DBUser
+from app.core.pagination import decode_cursor, next_cursor
+from app.core.responses import trusted_response
+from app.core.tabular import export_response
+from config.config import EXPORT_BATCH_SIZE
+from app.schemas.token import Principal
 
 router = APIRouter()
 
 @router.post("/list", response_model=APIResponse[List[User]], summary="获取用户列表")
-def read_users(
+async def read_users(
     params: UserQuery,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(is_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(is_admin)
 ):
     """获取用户列表（分页）"""
     # 验证分页参数合理性
     if params.pageSize > 500:
         raise BusinessException(msg="每页最大记录数不能超过500", code=400)
 
-    users = userdao.get_users(db, current=params.current, pageSize=params.pageSize)
-    return APIResponse(data=users)
+    # 只查询响应需要的列，支持通过fields指定字段子集
+    fields = params.fields or list(User.__fields__)
+    unknown = set(fields) - set(User.__fields__)
+    if unknown:
+        raise BusinessException(msg=f"不支持的字段：{', '.join(sorted(unknown))}", code=400)
+
+    total = await userdao.count_users_async(db) if params.withTotal else None
+    if params.cursor is not None:
+        users = await userdao.get_users_async(db, pageSize=params.pageSize, after_id=decode_cursor(params.cursor) or 0, fields=fields)
+        return trusted_response(APIResponse(data=users, total=total, next_cursor=next_cursor(users, params.pageSize)))
+
+    users = await userdao.get_users_async(db, current=params.current, pageSize=params.pageSize, fields=fields)
+    # DAO返回的投影行可信，直接序列化，跳过response_model校验
+    return trusted_response(APIResponse(data=users, total=total))
+
+@router.get("/export", summary="导出用户")
+async def export_users(
+    format: str = "csv",
+    current_user: Principal = Depends(is_admin)
+):
+    """流式导出全部用户（仅管理员），format为csv或ndjson"""
+    columns = [column.key for column in userdao.EXPORT_COLUMNS]
+    return export_response(
+        format, "users", columns,
+        lambda db: userdao.stream_users_async(db, EXPORT_BATCH_SIZE)
+    )
 
 @router.post("/get", response_model=APIResponse[User], summary="获取单个用户")
-def read_user(
+async def read_user(
     params: UserGet,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """获取用户详情（仅本人或管理员）"""
-    db_user = userdao.get_user(db, user_id=params.user_id)
+    db_user = await userdao.get_user_async(db, user_id=params.user_id)
     if not db_user:
         raise BusinessException(msg="用户不存在", code=404)
 
@@ -47,29 +75,24 @@ def read_user(
     return APIResponse(data=db_user)
 
 @router.post("/create", response_model=APIResponse[User], summary="创建新用户")
-def create_user(
+async def create_user(
     user: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(is_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(is_admin)
 ):
-    """创建新用户"""
-    if userdao.get_user_by_username(db, username=user.username):
-        raise BusinessException(msg="用户名已存在", code=400)
-
-    if userdao.get_user_by_email(db, email=user.email):
-        raise BusinessException(msg="邮箱已存在", code=400)
-
-    new_user = userdao.create_user(db=db, user=user)
+    """创建新用户（用户名、邮箱冲突由唯一索引判定）"""
+    new_user = await userdao.create_user_async(db=db, user=user)
     return APIResponse(code=201, msg="用户创建成功", data=new_user)
 
 @router.post("/update", response_model=APIResponse[User], summary="更新用户信息")
-def update_user(
+async def update_user(
     params: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """更新用户信息（仅本人或管理员）"""
-    db_user = userdao.get_user(db, user_id=params.user_id)
+    # 加行锁读取，令牌版本等字段基于最新数据更新
+    db_user = await userdao.get_user_async(db, user_id=params.user_id, for_update=True)
     if not db_user:
         raise BusinessException(msg="用户不存在", code=404)
 
@@ -77,27 +100,18 @@ def update_user(
     if db_user.id != current_user.id and current_user.role != "admin":
         raise BusinessException(msg="无权限修改", code=403)
 
-    # 检查用户名冲突
-    if params.username and params.username != db_user.username:
-        if userdao.get_user_by_username(db, username=params.username):
-            raise BusinessException(msg="用户名已存在", code=400)
-
-    # 检查邮箱冲突
-    if params.email and params.email != db_user.email:
-        if userdao.get_user_by_email(db, email=params.email):
-            raise BusinessException(msg="邮箱已存在", code=400)
-
-    updated_user = userdao.update_user(db=db, db_user=db_user, user_update=params)
+    # 用户名、邮箱冲突由唯一索引判定
+    updated_user = await userdao.update_user_async(db=db, db_user=db_user, user_update=params)
     return APIResponse(msg="用户更新成功", data=updated_user)
 
 @router.post("/delete", response_model=APIResponse, summary="删除用户")
-def delete_user(
+async def delete_user(
     params: UserDelete,
-    db: Session = Depends(get_db),
-    current_user: DBUser = Depends(is_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(is_admin)
 ):
     """删除用户"""
-    success = userdao.delete_user(db, user_id=params.user_id)
+    success = await userdao.delete_user_async(db, user_id=params.user_id)
     if not success:
         raise BusinessException(msg="用户不存在", code=404)
     
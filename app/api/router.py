@@ -1,10 +1,16 @@
-from fastapi import APIRouter
-from app.api.endpoints import attendance, roles, userapi, authapi
+from fastapi import APIRouter, Depends
+from app.api.endpoints import attendance, roles, userapi, authapi, internal
+from app.core.ratelimit import api_principal_limit, limit_by_ip, limit_by_principal, login_ip_limit
 
 api_router = APIRouter()
 
+# 限流依赖挂在路由器上，先于数据库会话等端点依赖执行
+auth_limit = [Depends(limit_by_ip("auth_ip", login_ip_limit))]
+api_limit = [Depends(limit_by_principal("api", api_principal_limit))]
+
 # 包含路由
-api_router.include_router(authapi.router, prefix="/auth", tags=["auth"])
-api_router.include_router(userapi.router, prefix="/users", tags=["users"])
-api_router.include_router(attendance.router, prefix="/attendance", tags=["attendance"])
-api_router.include_router(roles.router, prefix="/security", tags=["security"])
\ No newline at end of file
+api_router.include_router(authapi.router, prefix="/auth", tags=["auth"], dependencies=auth_limit)
+api_router.include_router(userapi.router, prefix="/users", tags=["users"], dependencies=api_limit)
+api_router.include_router(attendance.router, prefix="/attendance", tags=["attendance"], dependencies=api_limit)
+api_router.include_router(roles.router, prefix="/security", tags=["security"], dependencies=api_limit)
+api_router.include_router(internal.router, prefix="/internal", tags=["internal"], dependencies=api_limit)
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from config.config import PERMISSION_CACHE_TTL, USER_CACHE_TTL, COUNT_CACHE_TTL
+
+
+class TTLCache:
+    """线程安全的进程内缓存，条目超过ttl秒后失效，超过maxsize时淘汰最久未使用的条目"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，不存在或已过期时返回default"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入缓存"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """使指定键失效，未指定键时清空整个缓存"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+
+# 角色名 -> 权限标识集合(frozenset)
+permission_cache = TTLCache(ttl=PERMISSION_CACHE_TTL)
+
+# 表名 -> 总行数
+count_cache = TTLCache(ttl=COUNT_CACHE_TTL)
+
+# 用户ID -> (令牌版本, 是否激活)
+user_state_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=10000)
+
+# (用户ID, 令牌版本) -> 用户列值快照（dict，不保存ORM对象）
+user_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=10000)
+
+
+def invalidate_user(user_id: int) -> None:
+    """使指定用户的状态缓存与当前版本的用户快照失效"""
+    state = user_state_cache.get(user_id)
+    if state is not None:
+        user_cache.invalidate((user_id, state[0]))
+    user_state_cache.invalidate(user_id)
+
+
+# Redis地址 -> 异步客户端（限流与响应缓存使用同一地址时共享连接池）
+_redis_clients: Dict[str, Any] = {}
+
+
+def redis_client(url: str, setting: str) -> Any:
+    """获取异步Redis客户端，redis为可选依赖，仅在配置了Redis后端时导入
+
+    setting为选择Redis后端的配置项名称，用于缺少依赖时的报错提示。
+    """
+    client = _redis_clients.get(url)
+    if client is None:
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError(f"{setting}=redis 需要安装redis>=4.2")
+        client = _redis_clients[url] = redis.from_url(url)
+    return client
@@ -1,39 +1,100 @@
-from typing import List
+from typing import Any, Dict, FrozenSet, List, Union
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.models.role_permission import Role
 from app.models.user import User
+from app.schemas.token import Principal, TokenPayload
 from config.config import SECRET_KEY, ALGORITHM
-from config.database import get_db
-from app.crud import userdao
+from config.database import get_async_db, recent_writers
+from app.crud import roledao, userdao
+from app.core.cache import permission_cache, user_cache, user_state_cache
 from app.core.exceptions import BusinessException
 
 # OAuth2令牌提取器
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
-def get_current_user(
-	db: Session = Depends(get_db),
-	token: str = Depends(oauth2_scheme)
-) -> User:
-	"""获取当前登录用户"""
+def decode_token(token: str) -> TokenPayload:
+	"""解析并校验JWT令牌"""
 	try:
-		payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-		user_id: str = payload.get("sub")
-		if user_id is None:
-			raise BusinessException(msg="无法验证凭据", code=401)
-	except JWTError:
+		payload = TokenPayload(**jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+	except (JWTError, ValueError):
+		raise BusinessException(msg="无法验证凭据", code=401)
+	if payload.sub is None:
 		raise BusinessException(msg="无法验证凭据", code=401)
-	user = userdao.get_user(db, user_id=int(user_id))
+	return payload
+
+def check_user_state(payload: TokenPayload, token_version: int, is_active: bool) -> None:
+	"""校验用户是否被禁用、令牌版本是否仍然有效"""
+	if is_active is False:
+		raise BusinessException(msg="用户已被禁用", code=401)
+	if payload.ver is not None and payload.ver != token_version:
+		raise BusinessException(msg="令牌已失效，请重新登录", code=401)
+
+# 用户缓存只保存列值快照，不缓存与请求会话绑定的ORM对象
+USER_COLUMNS = tuple(attr.key for attr in sa_inspect(User).column_attrs)
 
-	if user is None:
-		raise BusinessException(msg="用户不存在", code=401)
+def snapshot_user(user: User) -> Dict[str, Any]:
+	"""提取用户的列值快照"""
+	return {key: getattr(user, key) for key in USER_COLUMNS}
+
+async def load_user(db: AsyncSession, payload: TokenPayload) -> User:
+	"""获取令牌对应的用户，优先读取(用户ID, 令牌版本)缓存
+
+	每次返回由快照新建的游离User对象，不属于任何会话，请求结束时的提交或回滚不会使其过期。
+	"""
+	state = user_state_cache.get(payload.sub)
+	snapshot = user_cache.get((payload.sub, state[0])) if state else None
+	if snapshot is None:
+		# 结果会缓存为用户状态，读取主库避免缓存副本上的旧令牌版本
+		user = await userdao.get_user_async(db, user_id=payload.sub, primary=True)
+		if user is None:
+			raise BusinessException(msg="用户不存在", code=401)
+		state = (user.token_version, user.is_active)
+		snapshot = snapshot_user(user)
+		user_state_cache.set(user.id, state)
+		user_cache.set((user.id, user.token_version), snapshot)
+	check_user_state(payload, *state)
+	return User(**snapshot)
+
+async def get_current_user(
+	request: Request,
+	db: AsyncSession = Depends(get_async_db),
+	token: str = Depends(oauth2_scheme)
+) -> User:
+	"""获取当前登录用户（完整用户信息）"""
+	user = await load_user(db, decode_token(token))
+	request.state.user_id = user.id
+	recent_writers.bind(user.id)
 	return user
 
-def is_admin(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_principal(
+	request: Request,
+	db: AsyncSession = Depends(get_async_db),
+	token: str = Depends(oauth2_scheme)
+) -> Principal:
+	"""获取当前认证主体
+
+	令牌内嵌了角色与令牌版本且用户状态缓存命中时不访问数据库；
+	禁用或角色变更最迟在USER_CACHE_TTL秒后生效。
+	"""
+	payload = decode_token(token)
+	state = user_state_cache.get(payload.sub)
+	if state is None or payload.ver is None or payload.role is None:
+		user = await load_user(db, payload)
+		principal = Principal(id=user.id, username=user.username, role=user.role, token_version=user.token_version)
+	else:
+		check_user_state(payload, *state)
+		principal = Principal(id=payload.sub, username=payload.username or "", role=payload.role, token_version=payload.ver)
+	request.state.user_id = principal.id
+	recent_writers.bind(principal.id)
+	return principal
+
+async def is_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
 	"""验证是否为管理员"""
 	if current_user.role != "admin":
 		raise BusinessException(msg="没有权限执行此操作", code=403)
@@ -41,22 +102,42 @@ def is_admin(current_user: User = Depends(get_current_user)) -> User:
 
 
 
-def get_user_permissions(db: Session, user: User) -> List[str]:
+def get_role_permissions(db: Session, role_name: str) -> FrozenSet[str]:
+	"""获取角色的权限标识集合（优先读取缓存）"""
+	permissions = permission_cache.get(role_name)
+	if permissions is None:
+		role = roledao.get_role_by_name(db, role_name, load="joined", primary=True)
+		permissions = frozenset(perm.code for perm in role.permissions) if role else frozenset()
+		permission_cache.set(role_name, permissions)
+	return permissions
+
+
+async def get_role_permissions_async(db: AsyncSession, role_name: str) -> FrozenSet[str]:
+	"""获取角色的权限标识集合（异步，命中缓存时不访问数据库）"""
+	permissions = permission_cache.get(role_name)
+	if permissions is None:
+		permissions = await db.run_sync(get_role_permissions, role_name)
+	return permissions
+
+
+def get_user_permissions(db: Session, user: Union[User, Principal]) -> List[str]:
 	"""获取用户的所有权限"""
-	role = db.query(Role).filter(Role.name == user.role).first()
-	if not role:
-		return []
-	return [perm.code for perm in role.permissions]
+	return sorted(get_role_permissions(db, user.role))
+
+
+async def get_user_permissions_async(db: AsyncSession, user: Union[User, Principal]) -> List[str]:
+	"""获取用户的所有权限（异步）"""
+	return sorted(await get_role_permissions_async(db, user.role))
 
 
 def check_permission(required_permission: str):
 	"""权限检查依赖项"""
 
-	def decorator(
-			db: Session = Depends(get_db),
-			current_user: User = Depends(get_current_user)
+	async def decorator(
+			db: AsyncSession = Depends(get_async_db),
+			current_user: Principal = Depends(get_current_principal)
 	):
-		permissions = get_user_permissions(db, current_user)
+		permissions = await get_role_permissions_async(db, current_user.role)
 		if required_permission not in permissions:
 			raise HTTPException(
 				status_code=status.HTTP_403_FORBIDDEN,
@@ -1,79 +1,76 @@
-from fastapi import Request, status
-from fastapi.responses import JSONResponse
+from typing import List, Optional
+
+from fastapi import Request, Response, status
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from app.core.responses import dumps
+
 class BusinessException(Exception):
     """自定义业务异常"""
-    def __init__(self, msg: str, code: int = 400):
+    def __init__(self, msg: str, code: int = 400, headers: Optional[dict] = None):
         self.msg = msg
         self.code = code
+        self.headers = headers
         super().__init__(self.msg)
 
+# 固定文案的高频错误，启动时预先渲染响应体
+FIXED_ERRORS = (
+    (401, "无法验证凭据"),
+    (401, "用户名或密码错误"),
+    (401, "令牌已失效，请重新登录"),
+    (403, "没有权限执行此操作"),
+    (403, "没有足够的权限执行此操作"),
+    (429, "请求过于频繁，请稍后再试"),
+    (500, "数据库操作失败"),
+    (500, "服务器内部错误"),
+)
+
+def _error_content(code: int, msg: str, errors: Optional[List[dict]] = None) -> dict:
+    content = {
+        "errorCode": code,
+        "errorMessage": msg,
+        "data": None,
+        "success": False
+    }
+    if errors is not None:
+        content["errors"] = errors
+    return content
+
+# 固定文案的错误响应体在导入时渲染；其余文案可能包含客户端输入（如Content-Type、字段名），每次直接编码不缓存
+RENDERED_ERRORS = {(code, msg): dumps(_error_content(code, msg)) for code, msg in FIXED_ERRORS}
+
+def error_response(request: Request, code: int, msg: str, errors: Optional[List[dict]] = None,
+                   headers: Optional[dict] = None) -> Response:
+    """构造统一错误响应（HTTP 200），错误码记录到请求状态供指标统计"""
+    request.state.error_code = code
+    body = RENDERED_ERRORS.get((code, msg)) if errors is None and isinstance(msg, str) else None
+    if body is None:
+        body = dumps(_error_content(code, msg, errors))
+    return Response(body, status_code=status.HTTP_200_OK, media_type="application/json", headers=headers)
+
 async def custom_exception_handler(request: Request, exc: BusinessException):
     """自定义业务异常处理器"""
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={
-            "errorCode": exc.code,
-            "errorMessage": exc.msg,
-            "data": None,
-	        "success": False
-        }
-    )
+    return error_response(request, exc.code, exc.msg, headers=exc.headers)
 
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """FastAPI原生HTTP异常处理器"""
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={
-            "errorCode": exc.status_code,
-            "errorMessage": exc.detail,
-            "data": None,
-	        "success": False
-        }
-    )
+    return error_response(request, exc.status_code, exc.detail, headers=getattr(exc, "headers", None))
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    """请求参数验证异常处理器"""
-    errors = []
-    for error in exc.errors():
-        errors.append({
-            "field": ".".join(map(str, error["loc"])),
-            "message": error["msg"]
-        })
-    
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={
-            "errorCode": 400,
-            "errorMessage": "参数验证失败："+str(errors),
-	        "data"   : None,
-	        "success": False
-        }
-    )
+    """请求参数验证异常处理器，errors为逐字段的校验明细"""
+    errors = [
+        {"field": ".".join(map(str, error["loc"])), "message": error["msg"]}
+        for error in exc.errors()
+    ]
+    summary = "；".join(f"{error['field']}：{error['message']}" for error in errors)
+    return error_response(request, 400, "参数验证失败：" + summary, errors)
 
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
     """数据库操作异常处理器"""
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={
-            "errorCode": 500,
-            "errorMessage": "数据库操作失败",
-            "data"   : None,
-	        "success": False
-        }
-    )
+    return error_response(request, 500, "数据库操作失败")
 
 async def general_exception_handler(request: Request, exc: Exception):
     """通用异常处理器（未捕获的异常）"""
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={
-            "errorCode": 500,
-            "errorMessage": "服务器内部错误",
-            "data"   : None,
-	        "success": False
-        }
-    )
+    return error_response(request, 500, "服务器内部错误")
@@ -1,60 +1,264 @@
+import atexit
+import json
 import logging
-from datetime import datetime
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-
-# 配置日志，明确指定UTF-8编码
-logging.basicConfig(
-	level=logging.INFO,
-	format="%(asctime)s - %(levelname)s - %(message)s",
-	handlers=[
-		logging.FileHandler("access.log", encoding="utf-8"),  # 指定UTF-8编码
-		logging.StreamHandler()  # 控制台输出
-	]
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config.config import (
+	ACCESS_LOG_FILE, ACCESS_LOG_CONSOLE, ACCESS_LOG_QUEUE_SIZE, ACCESS_LOG_BATCH_SIZE,
+	ACCESS_LOG_MAX_BYTES, ACCESS_LOG_ROTATE_WHEN, ACCESS_LOG_BACKUP_COUNT, ACCESS_LOG_SAMPLE_RATES,
+	ACCESS_LOG_CAPTURE_BODY, ACCESS_LOG_BODY_SAMPLE_RATE, ACCESS_LOG_BODY_MAX_BYTES, ACCESS_LOG_REDACT_FIELDS
 )
+
+
+class BatchFlushMixin:
+	"""延迟刷盘：累计batch_size条记录才真正flush，其余由监听线程在队列空闲时调用force_flush"""
+
+	batch_size = ACCESS_LOG_BATCH_SIZE
+	_pending = 0
+
+	def flush(self):
+		self._pending += 1
+		if self._pending >= self.batch_size:
+			self.force_flush()
+
+	def force_flush(self):
+		self._pending = 0
+		super().flush()
+
+	def close(self):
+		self.force_flush()
+		super().close()
+
+
+class BatchRotatingFileHandler(BatchFlushMixin, RotatingFileHandler):
+	"""按大小轮转、批量刷盘的文件处理器"""
+
+
+class BatchTimedRotatingFileHandler(BatchFlushMixin, TimedRotatingFileHandler):
+	"""按时间轮转、批量刷盘的文件处理器"""
+
+
+class BatchStreamHandler(BatchFlushMixin, logging.StreamHandler):
+	"""批量刷盘的控制台处理器"""
+
+
+class DroppingQueueHandler(QueueHandler):
+	"""写入有界队列，队列已满时丢弃日志并计数，保证请求线程和事件循环不被日志I/O阻塞"""
+
+	def __init__(self, log_queue: queue.Queue):
+		super().__init__(log_queue)
+		self.dropped = 0
+		self._lock = threading.Lock()
+
+	def enqueue(self, record):
+		try:
+			self.queue.put_nowait(record)
+		except queue.Full:
+			with self._lock:
+				self.dropped += 1
+
+
+class BatchQueueListener(QueueListener):
+	"""后台写日志线程，队列取空时统一刷盘"""
+
+	def dequeue(self, block):
+		try:
+			return self.queue.get_nowait()
+		except queue.Empty:
+			for handler in self.handlers:
+				if hasattr(handler, "force_flush"):
+					handler.force_flush()
+			return self.queue.get(block)
+
+	def enqueue_sentinel(self):
+		# 队列已满时也要等待写入结束标记，确保退出前日志全部落盘
+		self.queue.put(self._sentinel)
+
+
+def build_file_handler() -> logging.Handler:
+	"""根据配置创建按大小或按时间轮转的文件处理器，明确指定UTF-8编码"""
+	if ACCESS_LOG_ROTATE_WHEN:
+		return BatchTimedRotatingFileHandler(
+			ACCESS_LOG_FILE, when=ACCESS_LOG_ROTATE_WHEN, backupCount=ACCESS_LOG_BACKUP_COUNT, encoding="utf-8"
+		)
+	return BatchRotatingFileHandler(
+		ACCESS_LOG_FILE, maxBytes=ACCESS_LOG_MAX_BYTES, backupCount=ACCESS_LOG_BACKUP_COUNT, encoding="utf-8"
+	)
+
+
+# 配置日志：请求处理中只入队，由后台线程写文件和控制台
+log_queue: queue.Queue = queue.Queue(maxsize=ACCESS_LOG_QUEUE_SIZE)
+queue_handler = DroppingQueueHandler(log_queue)
+# 入队时只保留原始消息，时间与级别由输出处理器统一格式化
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
+# access.log只写访问日志，每行一条JSON；控制台输出所有日志
+file_handler = build_file_handler()
+file_handler.setFormatter(logging.Formatter("%(message)s"))
+file_handler.addFilter(lambda record: record.name == "api_access")
+output_handlers = [file_handler]
+if ACCESS_LOG_CONSOLE:
+	console_handler = BatchStreamHandler(sys.stderr)
+	console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+	output_handlers.append(console_handler)
+
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+log_listener = BatchQueueListener(log_queue, *output_handlers, respect_handler_level=True)
+log_listener.start()
+
 logger = logging.getLogger("api_access")
 
 
-class AccessLogMiddleware(BaseHTTPMiddleware):
-	async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+def get_log_stats() -> dict:
+	"""访问日志队列统计"""
+	return {
+		"queued": log_queue.qsize(),
+		"capacity": ACCESS_LOG_QUEUE_SIZE,
+		"dropped": queue_handler.dropped,
+	}
+
+
+def stop_log_listener() -> None:
+	"""停止后台写日志线程并刷盘（可重复调用）"""
+	if log_listener._thread is not None:
+		log_listener.stop()
+
+
+atexit.register(stop_log_listener)
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+	"""解析"路由模板=采样率"列表，"*"为默认采样率"""
+	rates = {"*": 1.0}
+	for item in value.split(","):
+		route, _, rate = item.strip().rpartition("=")
+		if route:
+			rates[route] = float(rate)
+	return rates
+
+
+SAMPLE_RATES = parse_sample_rates(ACCESS_LOG_SAMPLE_RATES)
+REDACT_FIELDS = frozenset(field.strip().lower() for field in ACCESS_LOG_REDACT_FIELDS.split(",") if field.strip())
+
+
+def redact(value: Any) -> Any:
+	"""递归脱敏敏感字段"""
+	if isinstance(value, dict):
+		return {k: "***" if str(k).lower() in REDACT_FIELDS else redact(v) for k, v in value.items()}
+	if isinstance(value, list):
+		return [redact(item) for item in value]
+	return value
+
+
+# 请求体不是完整JSON（如被截断）时按正则脱敏
+REDACT_PATTERN = re.compile(
+	r'("(?:%s)"\s*:\s*)("(?:[^"\\]|\\.)*"?|[^,}\s]*)' % "|".join(re.escape(field) for field in REDACT_FIELDS),
+	re.IGNORECASE,
+)
+
+
+def format_body(body: bytes, truncated: bool = False) -> str:
+	"""脱敏并截断请求体"""
+	try:
+		text = json.dumps(redact(json.loads(body)), ensure_ascii=False, separators=(",", ":"))
+	except ValueError:
+		text = REDACT_PATTERN.sub(r'\1"***"', body.decode("utf-8", errors="replace"))
+	if truncated or len(text) > ACCESS_LOG_BODY_MAX_BYTES:
+		text = text[:ACCESS_LOG_BODY_MAX_BYTES] + "...(truncated)"
+	return text
+
+
+class AccessLogMiddleware:
+	"""结构化（JSON Lines）访问日志，纯ASGI实现
+
+	通过包装receive/send统计字节数与耗时，不预先读取请求体，也不缓冲响应，
+	流式响应和大文件上传的内存占用保持恒定。
+	"""
+
+	def __init__(self, app: ASGIApp):
+		self.app = app
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+
 		# 记录请求开始时间
-		start_time = datetime.now()
-
-		# 获取基本信息
-		client_ip = request.client.host if request.client else "unknown"
-		method = request.method
-		path = request.url.path
-		query_params = dict(request.query_params)
-
-		# 获取用户标识（可根据实际认证机制修改）
-		user_identity = "anonymous"
-		# 如果有认证系统，可以从request.state中获取用户信息
-		# 例如: if hasattr(request.state, 'user'): user_identity = request.state.user.username
-
-		# 获取请求体（对于非GET请求）
-		request_body = {}
-		if method != "GET":
-			try:
-				request_body = await request.json()
-			except Exception:
-				# 处理无法解析JSON的情况
-				try:
-					request_body = await request.body()
-				except Exception as e:
-					request_body = f"无法解析请求体: {str(e)}"
-
-		# 处理请求
-		response = await call_next(request)
-
-		# 计算处理时间
-		process_time = (datetime.now() - start_time).total_seconds()
-
-		# 记录日志，确保支持中文等UTF-8字符
-		log_message = (
-			f"用户: {user_identity} | IP: {client_ip} | 方法: {method} | 路径: {path} | "
-			f"查询参数: {query_params} | 请求体: {request_body} | "
-			f"状态码: {response.status_code} | 处理时间: {process_time:.6f}秒"
-		)
-		logger.info(log_message)
+		start_time = time.perf_counter()
+		method = scope["method"]
+		bytes_in = 0
+		bytes_out = 0
+		status_code = 500
+
+		# 请求体仅在开启且命中采样时截取前ACCESS_LOG_BODY_MAX_BYTES字节
+		capture = ACCESS_LOG_CAPTURE_BODY and method != "GET" and random.random() < ACCESS_LOG_BODY_SAMPLE_RATE
+		captured = bytearray()
+		truncated = False
+
+		async def receive_wrapper() -> Message:
+			nonlocal bytes_in, truncated
+			message = await receive()
+			if message["type"] == "http.request":
+				chunk = message.get("body", b"")
+				bytes_in += len(chunk)
+				if capture and not truncated:
+					captured.extend(chunk[:ACCESS_LOG_BODY_MAX_BYTES + 1 - len(captured)])
+					truncated = len(captured) > ACCESS_LOG_BODY_MAX_BYTES
+			return message
+
+		async def send_wrapper(message: Message) -> None:
+			nonlocal bytes_out, status_code
+			if message["type"] == "http.response.start":
+				status_code = message["status"]
+			elif message["type"] == "http.response.body":
+				bytes_out += len(message.get("body", b""))
+			await send(message)
+
+		try:
+			await self.app(scope, receive_wrapper, send_wrapper)
+		finally:
+			body = format_body(bytes(captured[:ACCESS_LOG_BODY_MAX_BYTES]), truncated) if capture else None
+			self.log(scope, method, status_code, start_time, bytes_in, bytes_out, body)
+
+	@staticmethod
+	def log(
+		scope: Scope, method: str, status_code: int, start_time: float,
+		bytes_in: int, bytes_out: int, body: Optional[str]
+	) -> None:
+		# 使用路由模板而不是实际路径，便于按接口聚合
+		route = scope.get("route")
+		path = getattr(route, "path_format", scope["path"])
+		# 认证依赖解析令牌后写入request.state.user_id；异常处理器写入error_code（错误响应的HTTP状态码也是200）
+		state = scope.get("state") or {}
+		error_code = state.get("error_code") if isinstance(state, dict) else getattr(state, "error_code", None)
+		if 200 <= status_code < 300 and error_code is None:
+			rate = SAMPLE_RATES.get(path, SAMPLE_RATES["*"])
+			if rate < 1.0 and random.random() >= rate:
+				return
 
-		return response
+		client = scope.get("client")
+		record = {
+			"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+			"method": method,
+			"path": path,
+			"status": status_code,
+			"duration_ms": round((time.perf_counter() - start_time) * 1000, 3),
+			"user_id": state.get("user_id") if isinstance(state, dict) else getattr(state, "user_id", None),
+			"ip": client[0] if client else None,
+			"bytes_in": bytes_in,
+			"bytes_out": bytes_out,
+			"error_code": error_code,
+		}
+		if body is not None:
+			record["query"] = scope.get("query_string", b"").decode("latin-1")
+			record["body"] = body
+		logger.info(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
@@ -0,0 +1,271 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging import get_log_stats
+from app.core.security import password_hasher
+from config.database import (
+    async_engine, async_replica_engines, engine, get_pool_status, replica_engines, session_usage
+)
+
+# Prometheus文本格式的Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """指标基类，按标签值元组保存数据"""
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """只增计数器"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{format_labels(self.labelnames, labels)} {value}" for labels, value in items
+        ]
+
+
+class Histogram(Metric):
+    """直方图，桶计数在输出时累加"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # 标签值 -> [各桶计数..., +Inf桶计数, 总和]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [0] * (len(self.buckets) + 2)
+            data[index] += 1
+            data[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(data)) for labels, data in self._values.items()]
+        lines = self.header()
+        for labels, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), data[:-1]):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{format_labels(self.labelnames + ('le',), labels + (bound,))} {cumulative}"
+                )
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {data[-1]}")
+        return lines
+
+
+class Registry:
+    """进程内指标注册表，collector在抓取时按需生成瞬时指标（如连接池状态）"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LABELS = ("method", "route", "status", "error_code")
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP请求数（error_code为业务错误码，0表示成功）", REQUEST_LABELS
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP请求处理耗时（秒）", REQUEST_LABELS
+))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "每个请求执行的SQL语句数", ("route",), QUERY_COUNT_BUCKETS
+))
+db_time_per_request_seconds = registry.register(Histogram(
+    "db_time_per_request_seconds", "每个请求的SQL执行总耗时（秒）", ("route",)
+))
+db_queries_total = registry.register(Counter("db_queries_total", "执行的SQL语句总数"))
+
+
+# 当前请求的SQL统计：[语句数, 耗时秒数]
+request_db_stats: ContextVar[Optional[List[float]]] = ContextVar("request_db_stats", default=None)
+
+
+def instrument_engine(target: Engine) -> None:
+    """为引擎注册SQL执行计时事件"""
+
+    @event.listens_for(target, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        db_queries_total.inc()
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+for replica_engine in replica_engines:
+    instrument_engine(replica_engine)
+for replica_engine in async_replica_engines:
+    instrument_engine(replica_engine.sync_engine)
+
+
+def collect_pool_metrics() -> List[str]:
+    """连接池状态"""
+    snapshots = get_pool_status()
+    lines = []
+    gauges = (
+        ("db_pool_size", "size", "连接池常驻连接数"),
+        ("db_pool_checked_out", "checked_out", "已借出的连接数"),
+        ("db_pool_checked_in", "checked_in", "池中空闲连接数"),
+        ("db_pool_overflow", "overflow", "当前溢出连接数"),
+    )
+    for name, key, documentation in gauges:
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{pool="{s["name"]}"}} {s[key]}' for s in snapshots if s[key] is not None]
+    lines += ["# HELP db_pool_checkout_timeouts_total 取连接超时次数", "# TYPE db_pool_checkout_timeouts_total counter"]
+    lines += [f'db_pool_checkout_timeouts_total{{pool="{s["name"]}"}} {s["checkout_timeouts"]}' for s in snapshots]
+    lines += ["# HELP db_pool_wait_seconds 取连接等待时间（秒）", "# TYPE db_pool_wait_seconds histogram"]
+    for s in snapshots:
+        for bucket in s["wait_histogram"]:
+            lines.append(f'db_pool_wait_seconds_bucket{{pool="{s["name"]}",le="{bucket["le"]}"}} {bucket["count"]}')
+        lines.append(f'db_pool_wait_seconds_count{{pool="{s["name"]}"}} {s["wait_count"]}')
+        lines.append(f'db_pool_wait_seconds_sum{{pool="{s["name"]}"}} {s["wait_sum"]}')
+    lines += ["# HELP db_request_sessions_total 请求级会话数（unused：未创建会话；session_only：未执行SQL；connected：取用了连接）",
+              "# TYPE db_request_sessions_total counter"]
+    lines += [f'db_request_sessions_total{{usage="{kind}"}} {count}' for kind, count in session_usage.snapshot().items()]
+    return lines
+
+
+def collect_worker_metrics() -> List[str]:
+    """密码哈希进程池与访问日志队列状态"""
+    hasher = password_hasher.stats()
+    log = get_log_stats()
+    return [
+        "# HELP password_hash_in_flight 正在执行的密码哈希计算数",
+        "# TYPE password_hash_in_flight gauge",
+        f"password_hash_in_flight {hasher['in_flight']}",
+        "# HELP password_hash_queue_depth 等待执行的密码哈希计算数",
+        "# TYPE password_hash_queue_depth gauge",
+        f"password_hash_queue_depth {hasher['queue_depth']}",
+        "# HELP password_hash_rejected_total 因排队已满被拒绝的密码哈希计算数",
+        "# TYPE password_hash_rejected_total counter",
+        f"password_hash_rejected_total {hasher['rejected']}",
+        "# HELP access_log_queued 待写入的访问日志条数",
+        "# TYPE access_log_queued gauge",
+        f"access_log_queued {log['queued']}",
+        "# HELP access_log_dropped_total 因队列已满丢弃的访问日志条数",
+        "# TYPE access_log_dropped_total counter",
+        f"access_log_dropped_total {log['dropped']}",
+    ]
+
+
+registry.add_collector(collect_pool_metrics)
+registry.add_collector(collect_worker_metrics)
+
+
+class MetricsMiddleware:
+    """按路由模板、状态码与业务错误码统计请求数、耗时与SQL执行情况（纯ASGI实现）"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        db_stats = [0, 0.0]
+        token = request_db_stats.set(db_stats)
+        usage_token = session_usage.begin_request()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_db_stats.reset(token)
+            session_usage.end_request(usage_token)
+            # 未匹配的路径统一归类，避免原始路径造成标签基数膨胀
+            route = getattr(scope.get("route"), "path_format", "<unmatched>")
+            state = scope.get("state") or {}
+            error_code = state.get("error_code") if isinstance(state, dict) else getattr(state, "error_code", None)
+            if error_code is None:
+                error_code = 0 if status_code < 400 else status_code
+            labels = (scope["method"], route, str(status_code), str(error_code))
+            http_requests_total.inc(*labels)
+            http_request_duration_seconds.observe(time.perf_counter() - start_time, *labels)
+            db_queries_per_request.observe(db_stats[0], route)
+            db_time_per_request_seconds.observe(db_stats[1], route)
@@ -0,0 +1,32 @@
+import base64
+import json
+from typing import Optional
+
+from app.core.exceptions import BusinessException
+
+
+def encode_cursor(last_id: int) -> str:
+    """将本页最后一条记录的ID编码为不透明游标"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[int]:
+    """解析游标，空字符串表示第一页"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+    except (ValueError, KeyError, TypeError):
+        raise BusinessException(msg="无效的分页游标", code=400)
+    if not isinstance(last_id, int):
+        raise BusinessException(msg="无效的分页游标", code=400)
+    return last_id
+
+
+def next_cursor(rows: list, page_size: int) -> Optional[str]:
+    """本页已满时返回下一页游标，否则说明已到最后一页"""
+    if len(rows) < page_size:
+        return None
+    return encode_cursor(rows[-1].id)
@@ -0,0 +1,148 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+
+from fastapi import Request
+
+from app.core.cache import redis_client
+from app.core.dependencies import decode_token
+from app.core.exceptions import BusinessException
+from app.core.metrics import Counter, registry
+from config.config import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_REDIS_URL,
+    LOGIN_IP_LIMIT, LOGIN_USER_LIMIT, API_PRINCIPAL_LIMIT
+)
+
+rate_limited_total = registry.register(Counter(
+    "rate_limited_total", "被限流拒绝的请求数", ("scope",)
+))
+
+
+def parse_limit(spec: str) -> Tuple[float, float]:
+    """解析"次数/秒数"为(桶容量, 每秒补充速率)，次数与秒数都必须为正数"""
+    count, _, period = spec.partition("/")
+    try:
+        capacity, seconds = float(count), float(period or 1)
+    except ValueError:
+        capacity = seconds = 0
+    if not (capacity > 0 and seconds > 0 and math.isfinite(capacity / seconds)):
+        raise ValueError(f"限流配置应为\"次数/秒数\"且均为正数: {spec}")
+    return capacity, capacity / seconds
+
+
+class MemoryBackend:
+    """进程内令牌桶，超过maxsize时淘汰最久未访问的桶"""
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """尝试取出一个令牌，成功返回0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if wait == 0:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# 在Redis中原子地完成补充与扣减，桶在填满所需时间后自动过期
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Redis协议令牌桶，client需提供异步eval（redis.asyncio或支持Lua的同接口替身）"""
+
+    def __init__(self, client: Any, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        wait = await self.client.eval(TOKEN_BUCKET_SCRIPT, 1, self.prefix + key, capacity, rate, time.time())
+        return float(wait)
+
+
+def create_backend():
+    """按配置创建存储后端"""
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend(redis_client(RATE_LIMIT_REDIS_URL, "RATE_LIMIT_BACKEND"))
+    return MemoryBackend()
+
+
+class RateLimiter:
+    """令牌桶限流器，超限时抛出429业务异常并通过Retry-After告知等待时间"""
+
+    def __init__(self, backend=None, enabled: bool = True):
+        self.backend = backend if backend is not None else create_backend()
+        self.enabled = enabled
+
+    async def hit(self, scope: str, key: str, limit: Tuple[float, float]) -> None:
+        if not self.enabled:
+            return
+        capacity, rate = limit
+        wait = await self.backend.take(f"{scope}:{key}", capacity, rate)
+        if wait > 0:
+            rate_limited_total.inc(scope)
+            raise BusinessException(
+                msg="请求过于频繁，请稍后再试", code=429,
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+
+rate_limiter = RateLimiter(enabled=RATE_LIMIT_ENABLED)
+
+login_ip_limit = parse_limit(LOGIN_IP_LIMIT)
+login_user_limit = parse_limit(LOGIN_USER_LIMIT)
+api_principal_limit = parse_limit(API_PRINCIPAL_LIMIT)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(scope: str, limit: Tuple[float, float]) -> Callable:
+    """按客户端IP限流的依赖（挂在路由器上，先于会话依赖执行）"""
+    async def dependency(request: Request) -> None:
+        await rate_limiter.hit(scope, client_ip(request), limit)
+    return dependency
+
+
+def limit_by_principal(scope: str, limit: Tuple[float, float]) -> Callable:
+    """按登录用户限流的依赖，只解析令牌不查库；令牌缺失或无效时按IP计数，认证交由后续依赖处理"""
+    async def dependency(request: Request) -> None:
+        key = "ip:" + client_ip(request)
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                key = "user:" + str(decode_token(token).sub)
+            except BusinessException:
+                pass
+        await rate_limiter.hit(scope, key, limit)
+    return dependency
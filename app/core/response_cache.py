@@ -0,0 +1,134 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Type
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.cache import TTLCache, redis_client
+from app.core.metrics import Counter, registry
+from app.core.responses import dumps, to_plain, trusted_response
+from config.config import (
+    RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_REDIS_URL,
+    RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAXSIZE
+)
+
+response_cache_requests_total = registry.register(Counter(
+    "response_cache_requests_total", "响应缓存请求数（hit/miss/not_modified）", ("route", "result")
+))
+
+
+class MemoryBackend:
+    """进程内存储：条目为LRU+TTL，命名空间版本号保存在字典中"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self._entries = TTLCache(ttl=ttl, maxsize=maxsize)
+        self._versions: dict = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._entries.set(key, value)
+
+    async def versions(self, namespaces: Sequence[str]) -> List[int]:
+        return [self._versions.get(namespace, 0) for namespace in namespaces]
+
+    async def bump(self, namespaces: Sequence[str]) -> None:
+        for namespace in namespaces:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    """Redis协议存储，client只需提供异步的get/set(ex=)/mget/incr（redis.asyncio或同接口的替身）"""
+
+    def __init__(self, client: Any, ttl: int, prefix: str = "resp:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    async def versions(self, namespaces: Sequence[str]) -> List[int]:
+        values = await self.client.mget([f"{self.prefix}ver:{namespace}" for namespace in namespaces])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, namespaces: Sequence[str]) -> None:
+        for namespace in namespaces:
+            await self.client.incr(f"{self.prefix}ver:{namespace}")
+
+
+def create_backend():
+    """按配置创建存储后端"""
+    if RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(redis_client(RESPONSE_CACHE_REDIS_URL, "RESPONSE_CACHE_BACKEND"), RESPONSE_CACHE_TTL)
+    return MemoryBackend(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAXSIZE)
+
+
+def principal_key(principal: Any) -> Optional[list]:
+    """缓存键中的身份部分，令牌版本变化（角色变更、禁用）后自然换键"""
+    if principal is None:
+        return None
+    return [principal.id, principal.role, getattr(principal, "token_version", 0)]
+
+
+class ResponseCache:
+    """读多写少接口的响应缓存
+
+    键由路径、查询参数、当前身份及所属命名空间的版本号组成；写操作提交后递增命名空间版本号，
+    旧条目不再命中并随TTL过期。缓存序列化后的响应体与ETag，If-None-Match匹配时返回304。
+    """
+
+    def __init__(self, backend=None, enabled: bool = True):
+        self.backend = backend if backend is not None else create_backend()
+        self.enabled = enabled
+
+    async def serve(
+        self,
+        request: Request,
+        principal: Any,
+        namespaces: Sequence[str],
+        producer: Callable[[], Awaitable[Any]],
+        schema: Optional[Type[BaseModel]] = None,
+        params: Any = None,
+    ) -> Response:
+        """返回缓存的响应，未命中时调用producer生成并写入缓存"""
+        if not self.enabled:
+            return trusted_response(await producer(), schema)
+
+        route = request.scope.get("route")
+        route_name = getattr(route, "path", request.url.path)
+        versions = await self.backend.versions(namespaces)
+        raw_key = json.dumps(
+            [request.url.path, params, principal_key(principal), list(namespaces), versions],
+            sort_keys=True, default=str,
+        )
+        key = hashlib.sha1(raw_key.encode()).hexdigest()
+
+        entry = await self.backend.get(key)
+        if entry is not None:
+            etag, body = entry.split(b"\n", 1)
+            result = "hit"
+        else:
+            body = dumps(to_plain(await producer(), schema))
+            etag = b'"' + hashlib.sha1(body).hexdigest().encode() + b'"'
+            await self.backend.set(key, etag + b"\n" + body)
+            result = "miss"
+
+        headers = {"ETag": etag.decode(), "Cache-Control": "private, no-cache"}
+        if etag.decode() in request.headers.get("if-none-match", ""):
+            response_cache_requests_total.inc(route_name, "not_modified")
+            return Response(status_code=304, headers=headers)
+        response_cache_requests_total.inc(route_name, result)
+        return Response(body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """使命名空间下的全部缓存失效"""
+        await self.backend.bump(namespaces)
+
+
+response_cache = ResponseCache(enabled=RESPONSE_CACHE_ENABLED)
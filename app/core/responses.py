@@ -0,0 +1,83 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时退回标准库json
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """orjson/json无法直接编码的类型"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"无法序列化的类型：{type(value).__name__}")
+
+
+def _item_schema(field) -> Optional[Type[BaseModel]]:
+    """字段（含List[Model]）对应的嵌套模型"""
+    item_type = getattr(field, "type_", None)
+    if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+        return item_type
+    return None
+
+
+def to_plain(value: Any, schema: Optional[Type[BaseModel]] = None) -> Any:
+    """将响应内容转换为可直接编码的dict/list，不经过Pydantic校验
+
+    ORM对象按schema声明的字段取值（未指定schema时取全部映射列）；
+    Pydantic模型（如APIResponse信封）逐字段展开，schema继续作用于其中的ORM对象。
+    """
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item, schema) for item in value]
+    if isinstance(value, dict):
+        return {key: to_plain(item, schema) for key, item in value.items()}
+    if isinstance(value, BaseModel):
+        return {name: to_plain(getattr(value, name), schema) for name in value.__fields__}
+    state = getattr(value, "_sa_instance_state", None)
+    if state is not None:
+        if schema is None:
+            return {attr.key: getattr(value, attr.key) for attr in state.mapper.column_attrs}
+        return {
+            name: to_plain(getattr(value, name, None), _item_schema(field))
+            for name, field in schema.__fields__.items()
+        }
+    if hasattr(value, "_mapping"):  # 列投影查询返回的Row
+        return dict(value._mapping)
+    return value
+
+
+def dumps(content: Any) -> bytes:
+    """编码为JSON字节串（优先使用orjson）"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用orjson编码的JSON响应，作为应用默认响应类"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_response(content: Any, schema: Optional[Type[BaseModel]] = None,
+                     status_code: int = 200, headers: Optional[dict] = None,
+                     background: Optional[BackgroundTask] = None) -> FastJSONResponse:
+    """直接序列化DAO返回的可信数据，跳过response_model校验与jsonable_encoder
+
+    端点返回Response对象时FastAPI不再按response_model校验，
+    schema用于限定ORM对象输出的字段，保持与response_model声明一致。
+    """
+    return FastJSONResponse(to_plain(content, schema), status_code=status_code,
+                            headers=headers, background=background)
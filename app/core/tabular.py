@@ -0,0 +1,169 @@
+import codecs
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import BusinessException
+from config.database import AsyncSessionLocal
+
+# 支持的导入格式（按Content-Type识别）
+CSV_TYPES = ("text/csv", "application/csv")
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# 导出格式 -> 响应Content-Type
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def media_type(content_type: Optional[str]) -> str:
+    """去掉Content-Type中的参数部分（如charset）"""
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """将分块到达的UTF-8字节流逐行解码，不会把整个请求体读入内存"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[List[str], bool]]:
+    """按CSV记录产出(字段列表, 引号是否闭合)，带引号的字段中可以包含换行
+
+    引号成对出现（转义的双引号也是两个）时记录才算结束，否则继续拼接下一物理行。
+    """
+    buffered: List[str] = []
+    quotes = 0
+    async for line in iter_lines(chunks):
+        if not buffered and not line.strip():
+            continue
+        buffered.append(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield next(csv.reader(buffered)), True
+            buffered, quotes = [], 0
+    if buffered:
+        yield next(csv.reader(buffered)), False
+
+
+async def iter_records(content_type: Optional[str], chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """按格式解析上传数据，逐条产出(行号, 记录, 解析错误)
+
+    CSV首行为表头，空单元格视为未填写；NDJSON每行一个JSON对象；
+    JSON数组需要完整读取后解析，适合小批量数据。行号按记录从1开始计数，不含CSV表头。
+    """
+    kind = media_type(content_type)
+    if kind in CSV_TYPES:
+        header = None
+        row = 0
+        async for values, closed in iter_csv_records(chunks):
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row += 1
+            if not closed:
+                yield row, None, "引号未闭合"
+                continue
+            if len(values) != len(header):
+                yield row, None, f"列数不匹配：应为{len(header)}列，实际{len(values)}列"
+                continue
+            yield row, {key: value for key, value in zip(header, values) if value != ""}, None
+    elif kind in NDJSON_TYPES:
+        row = 0
+        async for line in iter_lines(chunks):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield row, None, "不是合法的JSON"
+                continue
+            if isinstance(record, dict):
+                yield row, record, None
+            else:
+                yield row, None, "每行必须是JSON对象"
+    elif kind in ("", "application/json"):
+        body = b"".join([chunk async for chunk in chunks])
+        try:
+            records = json.loads(body or b"[]")
+        except ValueError:
+            raise BusinessException(msg="请求体不是合法的JSON", code=400)
+        if not isinstance(records, list):
+            raise BusinessException(msg="JSON格式的请求体必须是数组", code=400)
+        for row, record in enumerate(records, start=1):
+            if isinstance(record, dict):
+                yield row, record, None
+            else:
+                yield row, None, "数组元素必须是JSON对象"
+    else:
+        raise BusinessException(msg=f"不支持的导入格式：{kind}", code=415)
+
+
+def _plain(value: Any) -> Any:
+    """将数据库值转换为可直接写入CSV/JSON的值"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+async def encode_rows(fmt: str, columns: Sequence[str], partitions: AsyncIterator[List[Sequence]]) -> AsyncIterator[bytes]:
+    """将分批读取的行编码为CSV或NDJSON，每批产出一个数据块
+
+    内存占用只与单批行数有关；CSV带BOM以便Excel正确识别UTF-8。
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\r\n")
+        writer.writerow(columns)
+        yield ("\ufeff" + buffer.getvalue()).encode()
+        async for rows in partitions:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_plain(value) for value in row] for row in rows)
+            yield buffer.getvalue().encode()
+    else:
+        async for rows in partitions:
+            yield "".join(
+                json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n"
+                for row in rows
+            ).encode()
+
+
+def export_response(fmt: str, filename: str, columns: Sequence[str],
+                    source: Callable[[AsyncSession], AsyncIterator[Sequence]]) -> StreamingResponse:
+    """构造流式导出响应
+
+    依赖注入的会话在响应开始发送前就会关闭，因此在响应体生成器内单独打开会话，
+    读取完成或客户端断开时随生成器一起关闭。
+    """
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise BusinessException(msg="导出格式仅支持csv或ndjson", code=400)
+
+    async def body() -> AsyncIterator[bytes]:
+        async with AsyncSessionLocal() as db:
+            async for chunk in encode_rows(fmt, columns, source(db)):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -1,15 +1,30 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, tuple_
-from typing import List, Optional
+from sqlalchemy import desc, insert, select
+from typing import AsyncIterator, Dict, List, Optional, Sequence
 from app.models.attendance import Day
+from app.core.response_cache import response_cache
+from app.crud.counting import paginate_with_total
+from config.database import on_commit_async
 from app.schemas.attendance import DayCreate, DayUpdate
 
 
-def get_days(db: Session, current: int = 0, pageSize: int = 100,month:str ='') -> dict[str, object]:
-	"""获取考勤记录列表（分页）"""
-	query = db.query(Day).filter(Day.month <= month).order_by(desc(Day.month)).limit(12)
-	total = query.count()
-	data = query.offset((current - 1) * pageSize).limit(pageSize).all()
+def get_days(db: Session, current: int = 1, pageSize: int = 100, month: int = 0, start_month: int = 0, with_total: bool = True) -> dict[str, object]:
+	"""获取start_month至month（均含，yyyymm整数）的考勤记录（分页，current为从1开始的页码）
+
+	月份区间条件配合(month, id)复合索引走索引范围扫描，按索引倒序返回，无需额外排序；
+	with_total为真时用窗口函数在同一条SQL中取得总数。
+	"""
+	query = (
+		db.query(Day)
+		.filter(Day.month >= start_month, Day.month <= month)
+		.order_by(desc(Day.month), desc(Day.id))
+	)
+	offset = max(current - 1, 0) * pageSize
+	if with_total:
+		data, total = paginate_with_total(query, offset, pageSize)
+	else:
+		data, total = query.offset(offset).limit(pageSize).all(), None
 	return {
 		"total": total,
 		"data": data
@@ -25,25 +40,73 @@ def create_day(db: Session, day: DayCreate) -> Day:
 		annual_leave_day=day.annual_leave_day
 	)
 	db.add(db_day)
-	db.commit()
-	db.refresh(db_day)
+	db.flush()
+	on_commit_async(db, lambda: response_cache.invalidate("attendance"))
 	return db_day
 
+def insert_days(db: Session, rows: List[Dict]) -> int:
+	"""批量插入一批考勤记录（executemany，随请求事务统一提交）"""
+	if not rows:
+		return 0
+	db.execute(insert(Day), rows)
+	on_commit_async(db, lambda: response_cache.invalidate("attendance"))
+	return len(rows)
+
 def update_day(db: Session, db_day: Day, day_update: DayUpdate) -> Day:
 	"""更新考勤记录"""
 	update_data = day_update.dict(exclude_unset=True)
 	for key, value in update_data.items():
 		setattr(db_day, key, value)
 	db.add(db_day)
-	db.commit()
-	db.refresh(db_day)
+	db.flush()
+	on_commit_async(db, lambda: response_cache.invalidate("attendance"))
 	return db_day
 
 def delete_day(db: Session, day_id: int) -> bool:
 	"""删除考勤记录"""
-	day = db.query(Day).filter(Day.id == day_id).first()
+	day = db.query(Day).filter(Day.id == day_id).with_for_update().first()
 	if day:
 		db.delete(day)
-		db.commit()
+		db.flush()
+		on_commit_async(db, lambda: response_cache.invalidate("attendance"))
 		return True
 	return False
+
+# 异步版本：通过run_sync在AsyncSession上复用同步实现
+async def get_days_async(db: AsyncSession, current: int = 1, pageSize: int = 100, month: int = 0, start_month: int = 0, with_total: bool = True) -> dict[str, object]:
+	"""获取考勤记录列表（分页，异步）"""
+	return await db.run_sync(get_days, current, pageSize, month, start_month, with_total)
+
+async def create_day_async(db: AsyncSession, day: DayCreate) -> Day:
+	"""创建新考勤记录（异步）"""
+	return await db.run_sync(create_day, day)
+
+async def insert_days_async(db: AsyncSession, rows: List[Dict]) -> int:
+	"""批量插入一批考勤记录（异步）"""
+	return await db.run_sync(insert_days, rows)
+
+async def update_day_async(db: AsyncSession, db_day: Day, day_update: DayUpdate) -> Day:
+	"""更新考勤记录（异步）"""
+	return await db.run_sync(update_day, db_day, day_update)
+
+async def delete_day_async(db: AsyncSession, day_id: int) -> bool:
+	"""删除考勤记录（异步）"""
+	return await db.run_sync(delete_day, day_id)
+
+
+# 导出列
+EXPORT_COLUMNS = (
+	Day.id, Day.month, Day.full_attendance_day, Day.real_day, Day.add_day,
+	Day.annual_leave_day, Day.created_at, Day.updated_at,
+)
+
+async def stream_days_async(db: AsyncSession, batch_size: int, start_month: Optional[int] = None, month: Optional[int] = None) -> AsyncIterator[Sequence]:
+	"""按月份顺序通过服务端游标分批读取考勤导出列，可按月份区间过滤"""
+	stmt = select(*EXPORT_COLUMNS).order_by(Day.month, Day.id)
+	if start_month is not None:
+		stmt = stmt.where(Day.month >= start_month)
+	if month is not None:
+		stmt = stmt.where(Day.month <= month)
+	result = await db.stream(stmt.execution_options(yield_per=batch_size))
+	async for rows in result.partitions():
+		yield rows
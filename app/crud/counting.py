@@ -0,0 +1,52 @@
+from sqlalchemy import func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from typing import List, Optional, Tuple
+from app.core.cache import count_cache
+from config.config import COUNT_APPROX_THRESHOLD
+
+
+def approximate_count(db: Session, model) -> Optional[int]:
+    """从表统计信息读取估算行数（仅MySQL，其他数据库返回None）"""
+    if db.get_bind().dialect.name != "mysql":
+        return None
+    return db.execute(
+        text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+        ),
+        {"table_name": model.__tablename__},
+    ).scalar()
+
+def table_count(db: Session, model) -> int:
+    """获取整表行数
+
+    优先读取缓存；缓存未命中时，大表使用统计信息估算值，小表执行精确COUNT。
+    结果缓存COUNT_CACHE_TTL秒，新增/删除记录时通过invalidate_count失效。
+    """
+    table_name = model.__tablename__
+    total = count_cache.get(table_name)
+    if total is None:
+        total = approximate_count(db, model)
+        if total is None or total < COUNT_APPROX_THRESHOLD:
+            total = db.query(func.count()).select_from(model).scalar()
+        count_cache.set(table_name, total)
+    return total
+
+def invalidate_count(model) -> None:
+    """使表行数缓存失效"""
+    count_cache.invalidate(model.__tablename__)
+
+def paginate_with_total(query: Query, offset: int, limit: int) -> Tuple[List, int]:
+    """用窗口函数在取分页数据的同一条SQL中得到过滤后的总数
+
+    页码超出范围时该页没有数据行，此时退化为一次COUNT查询。
+    """
+    rows = query.add_columns(func.count().over().label("total")).offset(offset).limit(limit).all()
+    if rows:
+        return [row[0] for row in rows], rows[0][-1]
+    return [], (query.order_by(None).count() if offset > 0 else 0)
+
+async def table_count_async(db: AsyncSession, model) -> int:
+    """获取整表行数（异步）"""
+    return await db.run_sync(table_count, model)
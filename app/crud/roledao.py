@@ -1,38 +1,75 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
+from typing import List, Literal, Optional
+from app.core.cache import permission_cache
 from app.models.role_permission import Role, Permission
 from app.schemas.role import RoleCreate, RoleUpdate, PermissionCreate
+from app.core.response_cache import response_cache
+from config.database import on_commit, on_commit_async, on_primary
 
-def get_role(db: Session, role_id: int) -> Optional[Role]:
-    return db.query(Role).filter(Role.id == role_id).first()
+# 角色权限加载策略：joined在同一条SQL中JOIN关联表，适合单个角色；
+# selectin额外一条IN查询加载整页角色的权限，适合列表；None表示不加载（调用方不访问权限时使用）
+PermissionLoad = Optional[Literal["joined", "selectin"]]
+PERMISSION_LOADERS = {
+    "joined": joinedload(Role.permissions),
+    "selectin": selectinload(Role.permissions),
+}
 
-def get_role_by_name(db: Session, name: str) -> Optional[Role]:
-    return db.query(Role).filter(Role.name == name).first()
+def _role_query(db: Session, load: PermissionLoad, for_update: bool = False, primary: bool = False) -> Query:
+    """角色查询；for_update只锁角色行（JOIN的关联表不加锁），primary为不加锁读取主库"""
+    query = db.query(Role)
+    if load is not None:
+        query = query.options(PERMISSION_LOADERS[load])
+    if for_update:
+        query = query.with_for_update(of=Role)
+    elif primary:
+        query = on_primary(query)
+    return query
 
-def get_roles(db: Session, current: int = 0, pageSize: int = 100) -> List[Role]:
-    return db.query(Role).offset(current).limit(pageSize).all()
+def get_role(db: Session, role_id: int, load: PermissionLoad = "joined", for_update: bool = False) -> Optional[Role]:
+    return _role_query(db, load, for_update).filter(Role.id == role_id).first()
+
+def get_role_by_name(db: Session, name: str, load: PermissionLoad = "joined", primary: bool = False) -> Optional[Role]:
+    return _role_query(db, load, primary=primary).filter(Role.name == name).first()
+
+def get_roles(db: Session, current: int = 0, pageSize: int = 100, after_id: Optional[int] = None,
+              load: PermissionLoad = "selectin") -> List[Role]:
+    query = _role_query(db, load).order_by(Role.id)
+    if after_id is not None:
+        return query.filter(Role.id > after_id).limit(pageSize).all()
+    return query.offset(current).limit(pageSize).all()
 
 def create_role(db: Session, role: RoleCreate) -> Role:
-    db_role = Role(name=role.name, description=role.description)
+    # 显式初始化空权限集合，序列化时无需再查询关联表
+    db_role = Role(name=role.name, description=role.description, permissions=[])
     db.add(db_role)
-    db.commit()
-    db.refresh(db_role)
+    db.flush()
+    on_commit_async(db, lambda: response_cache.invalidate("roles"))
+    # 清除该角色名可能存在的"无权限"缓存
+    on_commit(db, lambda: permission_cache.invalidate(role.name))
     return db_role
 
 def update_role(db: Session, db_role: Role, role_update: RoleUpdate) -> Role:
+    old_name = db_role.name
     update_data = role_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_role, key, value)
     db.add(db_role)
-    db.commit()
-    db.refresh(db_role)
+    db.flush()
+    on_commit_async(db, lambda: response_cache.invalidate("roles"))
+    on_commit(db, lambda: permission_cache.invalidate(old_name))
+    on_commit(db, lambda: permission_cache.invalidate(update_data.get("name", old_name)))
     return db_role
 
 def delete_role(db: Session, role_id: int) -> bool:
-    role = db.query(Role).filter(Role.id == role_id).first()
+    # 删除角色时需要清理关联表，一并加载权限集合
+    role = get_role(db, role_id, for_update=True)
     if role:
+        role_name = role.name
         db.delete(role)
-        db.commit()
+        db.flush()
+        on_commit_async(db, lambda: response_cache.invalidate("roles"))
+        on_commit(db, lambda: permission_cache.invalidate(role_name))
         return True
     return False
 
@@ -40,11 +77,15 @@ def delete_role(db: Session, role_id: int) -> bool:
 def get_permission(db: Session, permission_id: int) -> Optional[Permission]:
     return db.query(Permission).filter(Permission.id == permission_id).first()
 
-def get_permission_by_code(db: Session, code: str) -> Optional[Permission]:
-    return db.query(Permission).filter(Permission.code == code).first()
+def get_permission_by_code(db: Session, code: str, primary: bool = False) -> Optional[Permission]:
+    query = db.query(Permission).filter(Permission.code == code)
+    return (on_primary(query) if primary else query).first()
 
-def get_permissions(db: Session, current: int = 0, pageSize: int = 100) -> List[Permission]:
-    return db.query(Permission).offset(current).limit(pageSize).all()
+def get_permissions(db: Session, current: int = 0, pageSize: int = 100, after_id: Optional[int] = None) -> List[Permission]:
+    query = db.query(Permission).order_by(Permission.id)
+    if after_id is not None:
+        return query.filter(Permission.id > after_id).limit(pageSize).all()
+    return query.offset(current).limit(pageSize).all()
 
 def create_permission(db: Session, permission: PermissionCreate) -> Permission:
     db_perm = Permission(
@@ -53,25 +94,74 @@ def create_permission(db: Session, permission: PermissionCreate) -> Permission:
         description=permission.description
     )
     db.add(db_perm)
-    db.commit()
-    db.refresh(db_perm)
+    db.flush()
+    on_commit_async(db, lambda: response_cache.invalidate("roles"))
     return db_perm
 
 # 角色权限关联操作
 def add_permission_to_role(db: Session, role_id: int, permission_id: int) -> bool:
-    role = get_role(db, role_id)
+    # 锁住角色行后在主库上判断是否已分配，并发分配同一权限时不会写入重复的关联行
+    role = get_role(db, role_id, for_update=True)
     permission = get_permission(db, permission_id)
     if role and permission and permission not in role.permissions:
+        role_name = role.name
         role.permissions.append(permission)
-        db.commit()
+        db.flush()
+        on_commit_async(db, lambda: response_cache.invalidate("roles"))
+        on_commit(db, lambda: permission_cache.invalidate(role_name))
         return True
     return False
 
 def remove_permission_from_role(db: Session, role_id: int, permission_id: int) -> bool:
-    role = get_role(db, role_id)
+    role = get_role(db, role_id, for_update=True)
     permission = get_permission(db, permission_id)
     if role and permission and permission in role.permissions:
+        role_name = role.name
         role.permissions.remove(permission)
-        db.commit()
+        db.flush()
+        on_commit_async(db, lambda: response_cache.invalidate("roles"))
+        on_commit(db, lambda: permission_cache.invalidate(role_name))
         return True
     return False
+
+# 异步版本：通过run_sync在AsyncSession上复用同步实现
+# 响应序列化在事件循环中进行，需要权限的调用方应保留默认的预加载策略
+async def get_role_async(db: AsyncSession, role_id: int, load: PermissionLoad = "joined",
+                         for_update: bool = False) -> Optional[Role]:
+    return await db.run_sync(get_role, role_id, load, for_update)
+
+async def get_role_by_name_async(db: AsyncSession, name: str, load: PermissionLoad = "joined",
+                                 primary: bool = False) -> Optional[Role]:
+    return await db.run_sync(get_role_by_name, name, load, primary)
+
+async def get_roles_async(db: AsyncSession, current: int = 0, pageSize: int = 100, after_id: Optional[int] = None,
+                          load: PermissionLoad = "selectin") -> List[Role]:
+    return await db.run_sync(get_roles, current, pageSize, after_id, load)
+
+async def create_role_async(db: AsyncSession, role: RoleCreate) -> Role:
+    return await db.run_sync(create_role, role)
+
+async def update_role_async(db: AsyncSession, db_role: Role, role_update: RoleUpdate) -> Role:
+    """更新角色（db_role需已预加载权限）"""
+    return await db.run_sync(update_role, db_role, role_update)
+
+async def delete_role_async(db: AsyncSession, role_id: int) -> bool:
+    return await db.run_sync(delete_role, role_id)
+
+async def get_permission_async(db: AsyncSession, permission_id: int) -> Optional[Permission]:
+    return await db.run_sync(get_permission, permission_id)
+
+async def get_permission_by_code_async(db: AsyncSession, code: str, primary: bool = False) -> Optional[Permission]:
+    return await db.run_sync(get_permission_by_code, code, primary)
+
+async def get_permissions_async(db: AsyncSession, current: int = 0, pageSize: int = 100, after_id: Optional[int] = None) -> List[Permission]:
+    return await db.run_sync(get_permissions, current, pageSize, after_id)
+
+async def create_permission_async(db: AsyncSession, permission: PermissionCreate) -> Permission:
+    return await db.run_sync(create_permission, permission)
+
+async def add_permission_to_role_async(db: AsyncSession, role_id: int, permission_id: int) -> bool:
+    return await db.run_sync(add_permission_to_role, role_id, permission_id)
+
+async def remove_permission_from_role_async(db: AsyncSession, role_id: int, permission_id: int) -> bool:
+    return await db.run_sync(remove_permission_from_role, role_id, permission_id)
@@ -1,39 +1,97 @@
+import re
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Sequence, Union
+from app.core.cache import invalidate_user
+from app.core.exceptions import BusinessException
+from app.crud.counting import invalidate_count, table_count
+from app.core.response_cache import response_cache
+from config.database import on_commit, on_commit_async, on_primary
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from passlib.context import CryptContext
+from app.core.security import get_password_hash, get_password_hash_async, verify_password
 
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 唯一索引名（MySQL/PostgreSQL报错中的约束名）与SQLite报错中的"表.列" -> 冲突提示
+UNIQUE_VIOLATIONS = (
+    (("ix_users_username", "users.username"), "用户名已存在"),
+    (("ix_users_email", "users.email"), "邮箱已存在"),
+)
 
-def get_password_hash(password: str) -> str:
-    """生成密码哈希"""
-    return pwd_context.hash(password)
+# 从驱动报错中提取冲突的约束名（报错里还包含重复值本身，不能对整条消息做匹配）
+UNIQUE_KEY_PATTERNS = (
+    re.compile(r"for key '([^']+)'\W*$"),  # MySQL: Duplicate entry '...' for key 'users.ix_users_email'
+    re.compile(r'unique constraint "([^"]+)"'),  # PostgreSQL: duplicate key value violates unique constraint "..."
+    re.compile(r"UNIQUE constraint failed: ([\w.]+)"),  # SQLite: UNIQUE constraint failed: users.email
+)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """验证密码"""
-    return pwd_context.verify(plain_password, hashed_password)
+def _unique_key(message: str) -> Optional[str]:
+    """提取唯一约束冲突报错中的约束名"""
+    for pattern in UNIQUE_KEY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return match.group(1)
+    return None
 
-def get_user(db: Session, user_id: int) -> Optional[User]:
-    """根据ID获取用户"""
-    return db.query(User).filter(User.id == user_id).first()
+def _flush_unique(db: Session) -> None:
+    """直接写入并依赖唯一索引判重，将唯一约束冲突转换为对应的业务异常"""
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        key = _unique_key(str(exc.orig))
+        if key is not None:
+            for markers, msg in UNIQUE_VIOLATIONS:
+                if any(key == marker or key.endswith("." + marker) for marker in markers):
+                    raise BusinessException(msg=msg, code=400) from exc
+        raise
 
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
-    """根据用户名获取用户"""
-    return db.query(User).filter(User.username == username).first()
+def get_user(db: Session, user_id: int, for_update: bool = False, primary: bool = False) -> Optional[User]:
+    """根据ID获取用户
+
+    for_update=True时加行锁读取主库，用于读取后要修改的场景；primary=True时不加锁读取主库。
+    """
+    query = db.query(User).filter(User.id == user_id)
+    if for_update:
+        query = query.with_for_update()
+    elif primary:
+        query = on_primary(query)
+    return query.first()
+
+def get_user_by_username(db: Session, username: str, primary: bool = False) -> Optional[User]:
+    """根据用户名获取用户（primary=True时读取主库）"""
+    query = db.query(User).filter(User.username == username)
+    return (on_primary(query) if primary else query).first()
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """根据邮箱获取用户"""
     return db.query(User).filter(User.email == email).first()
 
-def get_users(db: Session, current: int = 0, pageSize: int = 100) -> List[User]:
-    """获取用户列表（分页）"""
-    return db.query(User).offset(current).limit(pageSize).all()
+def get_users(db: Session, current: int = 0, pageSize: int = 100, after_id: Optional[int] = None,
+              fields: Optional[Sequence[str]] = None) -> List[Union[User, Row]]:
+    """获取用户列表（分页），传入after_id时按主键游标分页
+
+    传入fields时只查询这些列（总是包含id），返回轻量的命名行而不是ORM实体，
+    不进入会话的identity map；未传时返回完整的User实体。
+    """
+    if fields is None:
+        query = db.query(User)
+    else:
+        names = ["id"] + [name for name in fields if name != "id"]
+        query = db.query(*(getattr(User, name) for name in names))
+    query = query.order_by(User.id)
+    if after_id is not None:
+        return query.filter(User.id > after_id).limit(pageSize).all()
+    return query.offset(current).limit(pageSize).all()
 
-def create_user(db: Session, user: UserCreate) -> User:
+def count_users(db: Session) -> int:
+    """获取用户总数（缓存/估算，新增或删除用户时失效）"""
+    return table_count(db, User)
+
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> User:
     """创建新用户"""
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -41,26 +99,51 @@ def create_user(db: Session, user: UserCreate) -> User:
         role=user.role
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _flush_unique(db)
+    on_commit_async(db, lambda: response_cache.invalidate("users"))
+    on_commit(db, lambda: invalidate_count(User))
     return db_user
 
+# 变更后需要使已签发令牌失效的字段
+TOKEN_SENSITIVE_FIELDS = ("role", "is_active", "hashed_password")
+
 def update_user(db: Session, db_user: User, user_update: UserUpdate) -> User:
     """更新用户信息"""
     update_data = user_update.dict(exclude_unset=True)
+    revoke_tokens = any(
+        key in update_data and update_data[key] != getattr(db_user, key)
+        for key in TOKEN_SENSITIVE_FIELDS
+    )
     for key, value in update_data.items():
         setattr(db_user, key, value)
+    if revoke_tokens:
+        # 在数据库中原子递增，并发更新不会丢失版本号
+        db_user.token_version = User.token_version + 1
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _flush_unique(db)
+    if revoke_tokens:
+        db.refresh(db_user, ["token_version"])
+    on_commit_async(db, lambda: response_cache.invalidate("users"))
+    user_id = db_user.id
+    on_commit(db, lambda: invalidate_user(user_id))
+    return db_user
+
+def update_password_hash(db: Session, db_user: User, hashed_password: str) -> User:
+    """替换密码哈希（仅更换哈希算法参数，密码本身不变，不使已签发令牌失效）"""
+    db_user.hashed_password = hashed_password
+    db.add(db_user)
+    db.flush()
     return db_user
 
 def delete_user(db: Session, user_id: int) -> bool:
     """删除用户"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user(db, user_id, for_update=True)
     if user:
         db.delete(user)
-        db.commit()
+        db.flush()
+        on_commit_async(db, lambda: response_cache.invalidate("users"))
+        on_commit(db, lambda: invalidate_user(user_id))
+        on_commit(db, lambda: invalidate_count(User))
         return True
     return False
 
@@ -72,3 +155,57 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     if not verify_password(password, user.hashed_password):
         return None
     return user
+
+# 异步版本：通过run_sync在AsyncSession上复用同步实现
+async def get_user_async(db: AsyncSession, user_id: int, for_update: bool = False,
+                         primary: bool = False) -> Optional[User]:
+    """根据ID获取用户（异步）"""
+    return await db.run_sync(get_user, user_id, for_update, primary)
+
+async def get_user_by_username_async(db: AsyncSession, username: str, primary: bool = False) -> Optional[User]:
+    """根据用户名获取用户（异步）"""
+    return await db.run_sync(get_user_by_username, username, primary)
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+    """根据邮箱获取用户（异步）"""
+    return await db.run_sync(get_user_by_email, email)
+
+async def get_users_async(db: AsyncSession, current: int = 0, pageSize: int = 100, after_id: Optional[int] = None,
+                          fields: Optional[Sequence[str]] = None) -> List[Union[User, Row]]:
+    """获取用户列表（分页，异步）"""
+    return await db.run_sync(get_users, current, pageSize, after_id, fields)
+
+async def count_users_async(db: AsyncSession) -> int:
+    """获取用户总数（异步）"""
+    return await db.run_sync(count_users)
+
+async def create_user_async(db: AsyncSession, user: UserCreate) -> User:
+    """创建新用户（异步，密码哈希在进程池中计算以免阻塞事件循环）"""
+    hashed_password = await get_password_hash_async(user.password)
+    return await db.run_sync(create_user, user, hashed_password)
+
+async def update_user_async(db: AsyncSession, db_user: User, user_update: UserUpdate) -> User:
+    """更新用户信息（异步）"""
+    return await db.run_sync(update_user, db_user, user_update)
+
+async def update_password_hash_async(db: AsyncSession, db_user: User, hashed_password: str) -> User:
+    """替换密码哈希（异步）"""
+    return await db.run_sync(update_password_hash, db_user, hashed_password)
+
+async def delete_user_async(db: AsyncSession, user_id: int) -> bool:
+    """删除用户（异步）"""
+    return await db.run_sync(delete_user, user_id)
+
+# 导出列（不含密码哈希等内部字段）
+EXPORT_COLUMNS = (
+    User.id, User.username, User.email, User.role, User.is_active,
+    User.phone, User.title, User.group, User.created_at, User.updated_at,
+)
+
+async def stream_users_async(db: AsyncSession, batch_size: int) -> AsyncIterator[Sequence]:
+    """按主键顺序通过服务端游标分批读取用户导出列，每次产出一批行"""
+    result = await db.stream(
+        select(*EXPORT_COLUMNS).order_by(User.id).execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        yield rows
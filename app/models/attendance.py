@@ -1,13 +1,17 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, DateTime
+from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, Index
 from datetime import datetime
 from config.database import Base
 
 class Day(Base):
     """考勤模型"""
     __tablename__ = "day"
-    
+    __table_args__ = (
+        # 按月份范围查询并按月份倒序分页，id保证同月多条记录时顺序稳定
+        Index("ix_day_month_id", "month", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True, comment="考勤记录ID")
-    month = Column(Integer, comment="月份")
+    month = Column(Integer, comment="月份（yyyymm整数，如202401）")
     full_attendance_day = Column(DECIMAL(10, 1), comment="满勤天数（计薪）")
     real_day = Column(DECIMAL(10, 1), comment="实际出勤")
     add_day = Column(DECIMAL(10, 1), comment="贡献天数")
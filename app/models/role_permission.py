@@ -22,8 +22,8 @@ class Role(Base):
     created_at = Column(DateTime, default=datetime.utcnow, comment="创建时间")
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="更新时间")
     
-    # 关联权限
-    permissions = relationship("Permission", secondary=role_permissions, back_populates="roles")
+    # 关联权限（禁止隐式延迟加载，查询时需通过roledao显式指定joined/selectin预加载，避免N+1查询）
+    permissions = relationship("Permission", secondary=role_permissions, back_populates="roles", lazy="raise_on_sql")
 
 class Permission(Base):
     """权限模型"""
@@ -13,6 +13,7 @@ class User(Base):
     hashed_password = Column(String(100), nullable=False, comment="加密后的密码")
     role = Column(String(20), default="user", nullable=False, comment="用户角色（user：普通用户，admin：管理员）")
     is_active = Column(Boolean, default=True, comment="是否激活")
+    token_version = Column(Integer, default=0, server_default="0", nullable=False, comment="令牌版本（角色变更或禁用时递增，使旧令牌失效）")
     created_at = Column(DateTime, default=datetime.utcnow, comment="创建时间")
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="更新时间")
     avatar = Column(String(255),  comment="头像")
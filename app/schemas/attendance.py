@@ -1,30 +1,58 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional, Union
+from datetime import date, datetime
+
+
+def parse_month(value: Union[str, int, None]) -> Optional[int]:
+    """将"2024-01"、"202401"或202401统一转换为yyyymm整数"""
+    if value is None or value == "":
+        return None
+    text = str(value).strip().replace("-", "").replace("/", "")
+    if len(text) != 6 or not text.isdigit() or not 1 <= int(text[4:]) <= 12:
+        raise ValueError("月份格式应为YYYY-MM或YYYYMM")
+    return int(text)
+
+def current_month() -> int:
+    """当前月份（yyyymm整数）"""
+    today = date.today()
+    return today.year * 100 + today.month
+
+def shift_month(month: int, months: int) -> int:
+    """yyyymm整数按月偏移"""
+    index = (month // 100) * 12 + month % 100 - 1 + months
+    return (index // 12) * 100 + index % 12 + 1
 
 class DayBase(BaseModel):
-    month: str
+    month: int = Field(..., description="月份，接受YYYY-MM或YYYYMM，存储为yyyymm整数")
     full_attendance_day: Optional[float] = None
     real_day: Optional[float] = None
     add_day: Optional[float] = None
     annual_leave_day: Optional[str] = None
 
+    _normalize_month = validator("month", pre=True, allow_reuse=True)(parse_month)
+
 class DayQuery(BaseModel):
-    """用户列表查询模型"""
-    current: int = Field(0, ge=0, description="跳过的记录数")
+    """考勤列表查询模型"""
+    current: int = Field(1, ge=0, description="页码（从1开始，0按1处理）")
     pageSize: int = Field(100, ge=1, le=500, description="每页记录数（1-500）")
-    month: Optional[str] = None
+    month: Optional[int] = Field(None, description="截止月份（含），默认当前月份")
+    startMonth: Optional[int] = Field(None, description="起始月份（含），默认截止月份往前共12个月")
+    withTotal: bool = Field(True, description="是否返回总数")
+
+    _normalize_month = validator("month", "startMonth", pre=True, allow_reuse=True)(parse_month)
 
 class DayCreate(DayBase):
     pass
 
 class DayUpdate(BaseModel):
-    month: Optional[str] = None
+    month: Optional[int] = None
     full_attendance_day: Optional[float] = None
     real_day: Optional[float] = None
     add_day: Optional[float] = None
     annual_leave_day: Optional[str] = None
 
+    _normalize_month = validator("month", pre=True, allow_reuse=True)(parse_month)
+
 class DayInDBBase(DayBase):
     id: int
     created_at: datetime
@@ -35,3 +63,15 @@ class DayInDBBase(DayBase):
 
 class Day(DayInDBBase):
     pass
+
+
+class ImportRowError(BaseModel):
+    """导入失败的行"""
+    row: int = Field(..., description="行号（从1开始，不含CSV表头）")
+    message: str = Field(..., description="错误原因")
+
+class ImportResult(BaseModel):
+    """批量导入结果"""
+    inserted: int = Field(0, description="写入的记录数")
+    failed: int = Field(0, description="校验失败的记录数")
+    errors: List[ImportRowError] = Field(default_factory=list, description="失败明细（最多返回IMPORT_MAX_ERRORS条）")
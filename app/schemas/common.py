@@ -8,6 +8,7 @@ class APIResponse(BaseModel, Generic[T]):
     success: bool = True
     data: Optional[T] = None
     total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
     errorCode:int =None
     errorMessage:str = ''
@@ -7,3 +7,13 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    role: Optional[str] = None
+    username: Optional[str] = None
+    ver: Optional[int] = None
+
+class Principal(BaseModel):
+    """当前请求的认证主体（无需完整用户信息的接口使用）"""
+    id: int
+    username: str
+    role: str
+    token_version: int = 0
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 
 class UserBase(BaseModel):
     """用户基本信息模型"""
@@ -23,6 +23,9 @@ class UserQuery(BaseModel):
     """用户列表查询模型"""
     current: int = Field(0, ge=0, description="跳过的记录数")
     pageSize: int = Field(100, ge=1, le=500, description="每页记录数（1-500）")
+    cursor: Optional[str] = Field(None, description="游标分页：传空字符串取第一页，之后传返回的next_cursor；不传时按current偏移分页")
+    withTotal: bool = Field(False, description="是否返回总数（缓存值，大表为统计信息估算值）")
+    fields: Optional[List[str]] = Field(None, description="只返回指定字段（User模型字段的子集，id总是返回）；不传时返回全部字段")
 
 class UserGet(BaseModel):
     """获取单个用户请求模型"""
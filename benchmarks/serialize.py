@@ -0,0 +1,87 @@
+"""用户列表响应序列化基准：对比response_model校验路径与trusted_response直出路径的行/秒
+
+用法：python -m benchmarks.serialize [--rows 1000] [--repeat 50]
+数据写入独立的SQLite内存库，再通过userdao.get_users读取，与/users/list使用相同的
+响应模型（app.schemas.usercheck.User）和DAO返回值：校验路径为完整User实体，
+直出路径为按响应字段投影的行。
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime
+from typing import List, Sequence
+
+# 基准只使用下方的内存库，未配置时避免应用引擎指向本地MySQL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.responses import FastJSONResponse, trusted_response
+from app.crud import userdao
+from app.models.user import User as DBUser
+from app.schemas.common import APIResponse
+from app.schemas.usercheck import User
+from config.database import Base
+
+
+def load_users(rows: int):
+    """写入rows个用户，返回(完整实体, 投影行)"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = Session(engine, expire_on_commit=False)
+    now = datetime.utcnow()
+    db.add_all([
+        DBUser(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x",
+               role="user", is_active=True, token_version=0, created_at=now, updated_at=now)
+        for i in range(1, rows + 1)
+    ])
+    db.commit()
+    entities = userdao.get_users(db, pageSize=rows)
+    projected = userdao.get_users(db, pageSize=rows, fields=list(User.__fields__))
+    db.close()
+    return entities, projected
+
+
+def build_app(entities: Sequence[DBUser], projected: Sequence) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/validated", response_model=APIResponse[List[User]], response_class=JSONResponse)
+    def validated():
+        return APIResponse(data=entities, total=len(entities))
+
+    @app.get("/validated-orjson", response_model=APIResponse[List[User]], response_class=FastJSONResponse)
+    def validated_orjson():
+        return APIResponse(data=entities, total=len(entities))
+
+    @app.get("/trusted", response_model=APIResponse[List[User]])
+    def trusted():
+        return trusted_response(APIResponse(data=projected, total=len(projected)))
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="每次响应的行数")
+    parser.add_argument("--repeat", type=int, default=50, help="每条路径的请求次数")
+    args = parser.parse_args()
+    # 每个请求一条的httpx日志会干扰计时
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    client = TestClient(build_app(*load_users(args.rows)))
+    for path in ("/validated", "/validated-orjson", "/trusted"):
+        client.get(path)  # 预热
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            client.get(path)
+        elapsed = time.perf_counter() - start
+        print(f"{path:<18} {args.rows * args.repeat / elapsed:>12,.0f} 行/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,22 @@ load_dotenv()
 
 # 数据库配置
 DATABASE_URL = os.getenv("DATABASE_URL")
+# 异步数据库地址（未配置时根据DATABASE_URL自动推导异步驱动）
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# 连接池配置
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))  # 常驻连接数
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))  # 允许超出常驻连接数的临时连接
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # 等待空闲连接的超时时间（秒）
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # 连接回收周期（秒），应小于MySQL的wait_timeout
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")  # 取出连接前检测是否可用
+
+# 只读副本配置（逗号分隔，未配置时所有查询走主库）
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# 异步副本地址（未配置时根据DATABASE_REPLICA_URLS自动推导异步驱动）
+ASYNC_DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("ASYNC_DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_STRATEGY = os.getenv("DB_REPLICA_STRATEGY", "round_robin")  # 副本选择策略：round_robin | least_connections
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))  # 用户提交写入后，其读取继续走主库的秒数（应大于复制延迟，0为关闭）
 
 # API配置
 DEFAULT_HOST = os.getenv("DEFAULT_HOST")
@@ -16,3 +32,48 @@ API_PREFIX = os.getenv("API_PREFIX")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60*12  # 令牌有效期（分钟）
+JWT_STATELESS = os.getenv("JWT_STATELESS", "true").lower() in ("1", "true", "yes")  # 令牌内嵌角色、用户名与令牌版本
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # bcrypt计算成本，成本不同的旧哈希在登录时自动重新生成
+
+# 密码哈希进程池配置（PASSWORD_HASH_WORKERS=0时改用线程池）
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))  # 进程数
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(max(PASSWORD_HASH_WORKERS, 1))))  # 同时执行的哈希计算上限
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "200"))  # 排队上限，超出时直接拒绝
+
+# 访问日志配置
+ACCESS_LOG_FILE = os.getenv("ACCESS_LOG_FILE", "access.log")
+ACCESS_LOG_CONSOLE = os.getenv("ACCESS_LOG_CONSOLE", "true").lower() in ("1", "true", "yes")  # 是否同时输出到控制台
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))  # 待写日志队列上限，超出时丢弃并计数
+ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", "200"))  # 累计多少条日志强制刷盘一次
+ACCESS_LOG_MAX_BYTES = int(os.getenv("ACCESS_LOG_MAX_BYTES", str(50 * 1024 * 1024)))  # 按大小轮转的阈值
+ACCESS_LOG_ROTATE_WHEN = os.getenv("ACCESS_LOG_ROTATE_WHEN", "")  # 按时间轮转（如midnight、H），为空时按大小轮转
+ACCESS_LOG_BACKUP_COUNT = int(os.getenv("ACCESS_LOG_BACKUP_COUNT", "10"))  # 保留的历史日志文件数
+ACCESS_LOG_SAMPLE_RATES = os.getenv("ACCESS_LOG_SAMPLE_RATES", "*=1")  # 按路由模板的采样率，形如"/api/v1/users/list=0.1,*=1"，非2xx响应总是记录
+ACCESS_LOG_CAPTURE_BODY = os.getenv("ACCESS_LOG_CAPTURE_BODY", "false").lower() in ("1", "true", "yes")  # 是否记录请求体
+ACCESS_LOG_BODY_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_BODY_SAMPLE_RATE", "0.01"))  # 记录请求体的请求比例
+ACCESS_LOG_BODY_MAX_BYTES = int(os.getenv("ACCESS_LOG_BODY_MAX_BYTES", "2048"))  # 请求体记录的最大长度
+ACCESS_LOG_REDACT_FIELDS = os.getenv("ACCESS_LOG_REDACT_FIELDS", "password,hashed_password,access_token,token,secret")  # 需要脱敏的字段
+
+# 批量导入配置
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))  # 每批插入的行数
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))  # 响应中最多返回的错误行数
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))  # 导出时每次从游标读取的行数
+
+# 限流配置（令牌桶，格式为"次数/秒数"：桶容量为次数，按次数/秒数的速率匀速补充）
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory：进程内；redis：多进程共享
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+LOGIN_IP_LIMIT = os.getenv("LOGIN_IP_LIMIT", "30/60")  # 认证接口按客户端IP限流
+LOGIN_USER_LIMIT = os.getenv("LOGIN_USER_LIMIT", "5/60")  # 登录接口按用户名限流，防止针对单个账号的撞库
+API_PRINCIPAL_LIMIT = os.getenv("API_PRINCIPAL_LIMIT", "300/60")  # 其他接口按登录用户限流（未登录时按IP）
+
+# 缓存配置
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")  # 读多写少接口的响应缓存
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # memory：进程内LRU；redis：多进程共享
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "30"))  # 响应缓存有效期（秒），写操作提交后主动失效
+RESPONSE_CACHE_MAXSIZE = int(os.getenv("RESPONSE_CACHE_MAXSIZE", "2048"))  # 进程内响应缓存最大条目数
+PERMISSION_CACHE_TTL = int(os.getenv("PERMISSION_CACHE_TTL", "60"))  # 角色权限缓存有效期（秒）
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "300"))  # 表总数缓存有效期（秒），新增/删除时主动失效
+COUNT_APPROX_THRESHOLD = int(os.getenv("COUNT_APPROX_THRESHOLD", "100000"))  # 统计信息估算行数超过该值时直接使用估算值（仅MySQL）
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "30"))  # 用户状态缓存有效期（秒），即禁用或角色变更生效的最长延迟
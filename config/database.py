@@ -1,21 +1,268 @@
-from sqlalchemy import create_engine
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from config.config import DATABASE_URL
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+from config.config import (
+    DATABASE_URL, ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DATABASE_REPLICA_URLS, ASYNC_DATABASE_REPLICA_URLS, DB_REPLICA_STRATEGY, DB_REPLICA_STICKY_SECONDS
+)
+from config.pool import PoolStats, RecentWriters, ReplicaSelector, SessionUsageStats, instrumented_pool_class
+
+logger = logging.getLogger(__name__)
+
+# 同步方言对应的异步驱动
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """将同步数据库地址转换为异步驱动地址"""
+    sync_url = make_url(url)
+    driver = ASYNC_DRIVERS.get(sync_url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"不支持的异步数据库类型: {sync_url.get_backend_name()}")
+    return sync_url.set(drivername=driver).render_as_string(hide_password=False)
+
+def pool_options(url: str, pool_class, stats: PoolStats) -> dict:
+    """根据配置生成连接池参数（SQLite内存库使用默认连接池）"""
+    db_url = make_url(url)
+    if db_url.get_backend_name() == "sqlite" and db_url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(pool_class, stats),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+# 最近提交过写入的用户，窗口期内其读取走主库
+recent_writers = RecentWriters(DB_REPLICA_STICKY_SECONDS if DATABASE_REPLICA_URLS else 0)
+
+def on_primary(query):
+    """让查询在主库执行但不加锁，用于唯一性预检查、认证与权限等会被缓存的状态读取
+
+    读取后要修改的行应使用with_for_update()，加锁的同时也会路由到主库。
+    """
+    return query.execution_options(use_primary=True)
+
+def _is_write(clause) -> bool:
+    """判断语句是否需要在主库执行：DML、SELECT ... FOR UPDATE以及非SELECT的原生SQL"""
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().lower().startswith("select")
+    return getattr(clause, "_for_update_arg", None) is not None
+
+class RoutingSession(Session):
+    """读写分离会话：只读查询发往副本，写操作以及同一会话中写之后的所有查询留在主库
+
+    以下读取也走主库：on_primary()标记的查询、加锁读取（之后会话内的查询都留在主库），
+    以及刚提交过写入的用户在DB_REPLICA_STICKY_SECONDS内的读取。
+    未配置副本时与普通Session行为一致。每个会话只选择一次副本，避免同一请求的读取分散到多个副本。
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSelector] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self.replicas is None or self.info.get("use_primary") or self._flushing or _is_write(clause):
+            if self.replicas is not None:
+                # 写之后读主库，避免读到副本尚未同步的数据
+                self.info["use_primary"] = True
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if getattr(clause, "_execution_options", {}).get("use_primary") or recent_writers.active():
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        replica = self.info.get("replica")
+        if replica is None:
+            replica = self.info["replica"] = self.replicas.choose()
+        return replica
+
+# 连接池统计
+pool_stats = PoolStats("primary")
+async_pool_stats = PoolStats("primary_async")
+session_usage = SessionUsageStats()
 
 # 创建数据库引擎
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, QueuePool, pool_stats))
+
+# 创建只读副本引擎
+replica_pool_stats = [PoolStats(f"replica{i}") for i in range(len(DATABASE_REPLICA_URLS))]
+replica_engines = [
+    create_engine(url, **pool_options(url, QueuePool, stats))
+    for url, stats in zip(DATABASE_REPLICA_URLS, replica_pool_stats)
+]
+replicas = ReplicaSelector(replica_engines, DB_REPLICA_STRATEGY) if replica_engines else None
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 创建会话工厂（提交后不过期：主键与默认值在INSERT时已回填，无需再refresh或延迟加载）
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, expire_on_commit=False,
+    bind=engine, replicas=replicas
+)
+
+# 创建异步数据库引擎
+_async_url = ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url, **pool_options(_async_url, AsyncAdaptedQueuePool, async_pool_stats)
+)
+
+# 创建异步只读副本引擎
+_async_replica_urls = ASYNC_DATABASE_REPLICA_URLS or [to_async_url(url) for url in DATABASE_REPLICA_URLS]
+async_replica_pool_stats = [PoolStats(f"replica{i}_async") for i in range(len(_async_replica_urls))]
+async_replica_engines = [
+    create_async_engine(url, **pool_options(url, AsyncAdaptedQueuePool, stats))
+    for url, stats in zip(_async_replica_urls, async_replica_pool_stats)
+]
+async_replicas = (
+    ReplicaSelector([target.sync_engine for target in async_replica_engines], DB_REPLICA_STRATEGY)
+    if async_replica_engines else None
+)
+
+# 创建异步会话工厂（提交后不过期，避免在事件循环中触发延迟加载）
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, sync_session_class=RoutingSession,
+    autoflush=False, expire_on_commit=False, replicas=async_replicas
+)
 
 # 声明基类
 Base = declarative_base()
 
-# 获取数据库会话依赖
+def get_pool_status() -> list:
+    """获取主库与只读副本的同步、异步引擎连接池状态"""
+    return [
+        pool_stats.snapshot(engine.pool),
+        async_pool_stats.snapshot(async_engine.sync_engine.pool),
+        *(stats.snapshot(target.pool) for stats, target in zip(replica_pool_stats, replica_engines)),
+        *(stats.snapshot(target.sync_engine.pool)
+          for stats, target in zip(async_replica_pool_stats, async_replica_engines)),
+    ]
+
+# 工作单元：DAO只flush不提交，由请求级会话依赖在请求结束时统一提交或回滚
+def on_commit(db: Session, callback: Callable[[], None]) -> None:
+    """登记在本次事务提交成功后执行的回调（如缓存失效），回滚时丢弃"""
+    db.info.setdefault("on_commit", []).append(callback)
+
+def on_commit_async(db: Session, callback: Callable[[], Awaitable[None]]) -> None:
+    """登记提交成功后需要await的回调（如共享响应缓存失效），由get_async_db在提交后执行"""
+    db.info.setdefault("on_commit_async", []).append(callback)
+
+def has_writes(db: Session) -> bool:
+    """本次事务是否执行过写操作，只读请求无需发送COMMIT"""
+    return bool(db.info.get("has_writes"))
+
+@event.listens_for(Session, "after_begin")
+def _mark_connected(session, transaction, connection):
+    session.info["connected"] = True
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_execute(orm_execute_state):
+    # session.execute(insert(...))等批量写入不经过flush，需单独标记
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session):
+    if session.info.pop("has_writes", None):
+        recent_writers.remember()
+    for callback in session.info.pop("on_commit", []):
+        try:
+            callback()
+        except Exception:
+            logger.exception("提交后回调执行失败")
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_commit(session, previous_transaction):
+    session.info.pop("has_writes", None)
+    session.info.pop("on_commit", None)
+    session.info.pop("on_commit_async", None)
+
+class LazySession:
+    """请求级会话代理：首次访问会话属性时才创建会话，首次执行SQL时才从连接池取连接
+
+    被认证、参数校验等提前拒绝的请求不会创建会话，也不会占用连接。
+    """
+
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._session: Optional[Any] = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    def usage(self) -> str:
+        """会话使用情况：unused未创建会话，session_only创建了会话但未执行SQL，connected取用了连接"""
+        if self._session is None:
+            return "unused"
+        sync_session = getattr(self._session, "sync_session", self._session)
+        return "connected" if sync_session.info.get("connected") else "session_only"
+
+async def end_read_async(db: AsyncSession) -> None:
+    """结束只读事务并将连接归还连接池，之后的查询会重新取连接
+
+    用于查询后还要长时间等待（如排队校验bcrypt）的接口，避免等待期间占用连接。
+    提交不使对象过期，已加载的数据仍可使用；会话中已有写入时不提前提交，保持工作单元语义。
+    """
+    if getattr(db, "started", True) and db.in_transaction() and not has_writes(db.sync_session):
+        await db.commit()
+
+# 获取数据库会话依赖（请求级工作单元：正常结束时提交，出现异常时回滚）
 def get_db():
-    db = SessionLocal()
+    db = LazySession(SessionLocal)
+    try:
+        yield db
+        if db.started and has_writes(db._session):
+            db.commit()
+    except Exception:
+        if db.started:
+            db.rollback()
+        raise
+    finally:
+        session_usage.record(db.usage())
+        if db.started:
+            db.close()
+
+# 获取异步数据库会话依赖（请求级工作单元，同get_db）
+async def get_async_db():
+    db = LazySession(AsyncSessionLocal)
     try:
         yield db
+        if db.started and has_writes(db.sync_session):
+            await db.commit()
+            for callback in db.sync_session.info.pop("on_commit_async", []):
+                # 写入已提交，缓存失效失败（如Redis不可用）只记录日志，不能让请求返回失败
+                try:
+                    await callback()
+                except Exception:
+                    logger.exception("提交后回调执行失败")
+    except Exception:
+        if db.started:
+            await db.rollback()
+        raise
     finally:
-        db.close()
+        session_usage.record(db.usage())
+        if db.started:
+            await db.close()
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -8,7 +9,10 @@ from app.api.router import api_router
 from app.core.exceptions import BusinessException, custom_exception_handler
 from app.core.exceptions import general_exception_handler, http_exception_handler, sqlalchemy_exception_handler, \
 	validation_exception_handler
-from app.core.logging import AccessLogMiddleware
+from app.core.logging import AccessLogMiddleware, stop_log_listener
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.core.responses import FastJSONResponse
+from app.core.security import password_hasher
 from config.config import API_PREFIX
 # 创建数据库表
 from config.database import Base, engine
@@ -19,7 +23,8 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="FastAPI Project",
     description="A FastAPI project with unified response format and authentication",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # 注册异常处理器
@@ -29,6 +34,7 @@ app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 app.add_middleware(AccessLogMiddleware)
+app.add_middleware(MetricsMiddleware)
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,11 +42,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # 游标分页的下一页游标
 )
 # 注册路由
 app.include_router(api_router, prefix=API_PREFIX)
 
+# 关闭时释放密码哈希进程池，并将剩余访问日志写入磁盘
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    password_hasher.shutdown()
+    stop_log_listener()
+
 # 根路径
 @app.get("/")
 def read_root():
     return {"message": "欢迎使用fastApi项目模板!"}
+
+# Prometheus指标
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,186 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, Hashable, List, Optional, Sequence, Type
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# 连接等待时间直方图的桶边界（秒）
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolStats:
+    """连接池统计：取连接等待时间直方图与超时次数"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self._wait_sum = 0.0
+        self._wait_count = 0
+        self._timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        """记录一次取连接的等待时间"""
+        index = len(WAIT_BUCKETS)
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self._bucket_counts[index] += 1
+            self._wait_sum += seconds
+            self._wait_count += 1
+
+    def record_timeout(self) -> None:
+        """记录一次取连接超时"""
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self, pool: Pool) -> Dict[str, object]:
+        """返回连接池当前状态与累计统计"""
+        with self._lock:
+            bucket_counts = list(self._bucket_counts)
+            wait_sum, wait_count, timeouts = self._wait_sum, self._wait_count, self._timeouts
+
+        histogram = []
+        cumulative = 0
+        for bound, count in zip(WAIT_BUCKETS + ("+Inf",), bucket_counts):
+            cumulative += count
+            histogram.append({"le": bound, "count": cumulative})
+
+        return {
+            "name": self.name,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "checkout_timeouts": timeouts,
+            "wait_count": wait_count,
+            "wait_sum": wait_sum,
+            "wait_histogram": histogram,
+        }
+
+
+class SessionUsageStats:
+    """请求级会话统计：按是否创建会话、是否实际取用连接分类计数
+
+    由请求中间件包裹每个请求时，会话依赖上报的情况先记在请求内，请求结束时统一计数；
+    在会话依赖执行前就被拒绝的请求（如限流、路由不存在）计为unused。
+    """
+
+    KINDS = ("unused", "session_only", "connected")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.KINDS, 0)
+        self._request: ContextVar[Optional[List[str]]] = ContextVar("request_session_usage", default=None)
+
+    def begin_request(self) -> Token:
+        """开始收集当前请求的会话使用情况"""
+        return self._request.set([])
+
+    def end_request(self, token: Token) -> None:
+        """结束当前请求：计入本请求上报的会话，未使用会话依赖时计为unused"""
+        kinds = self._request.get() or ["unused"]
+        self._request.reset(token)
+        self._count(kinds)
+
+    def record(self, kind: str) -> None:
+        kinds = self._request.get()
+        if kinds is not None:
+            kinds.append(kind)
+        else:
+            self._count([kind])
+
+    def _count(self, kinds: List[str]) -> None:
+        with self._lock:
+            for kind in kinds:
+                self._counts[kind] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+def instrumented_pool_class(base: Type[Pool], stats: PoolStats) -> Type[Pool]:
+    """基于base生成记录取连接耗时与超时的连接池类
+
+    统计对象挂在类属性上，engine.dispose()重建连接池后仍然沿用。
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            stats.record_timeout()
+            raise
+        stats.observe_wait(time.perf_counter() - start)
+        return connection
+
+    return type(f"Instrumented{base.__name__}", (base,), {"stats": stats, "connect": connect})
+
+
+class ReplicaSelector:
+    """只读副本选择：round_robin依次轮询，least_connections选择已借出连接最少的副本"""
+
+    STRATEGIES = ("round_robin", "least_connections")
+
+    def __init__(self, engines: Sequence[Engine], strategy: str = "round_robin"):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"不支持的副本选择策略: {strategy}")
+        if not engines:
+            raise ValueError("至少需要一个只读副本")
+        self.engines: List[Engine] = list(engines)
+        self.strategy = strategy
+        self._counter = itertools.count()
+
+    def choose(self) -> Engine:
+        start = next(self._counter) % len(self.engines)
+        if self.strategy == "round_robin":
+            return self.engines[start]
+        # 从轮询位置开始比较，借出连接数相同时仍能均匀分配
+        candidates = self.engines[start:] + self.engines[:start]
+        return min(candidates, key=lambda target: target.pool.checkedout() if hasattr(target.pool, "checkedout") else 0)
+
+
+class RecentWriters:
+    """记录最近提交过写入的请求主体（如用户ID），窗口期内其读取走主库，保证能读到自己刚写入的数据
+
+    当前请求的主体由认证依赖通过bind()写入上下文变量；记录只保存在本进程，
+    多进程部署时同一用户的后续请求落到其他进程仍可能读到副本上的旧数据。
+    """
+
+    def __init__(self, window: float, maxsize: int = 100000):
+        self.window = window
+        self.maxsize = maxsize
+        self._deadlines: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self._current: ContextVar[Optional[Hashable]] = ContextVar("request_principal", default=None)
+
+    def bind(self, key: Hashable) -> None:
+        """登记当前请求的主体"""
+        self._current.set(key)
+
+    def remember(self) -> None:
+        """当前请求提交了写入"""
+        key = self._current.get()
+        if key is None or self.window <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._deadlines) >= self.maxsize:
+                self._deadlines = {k: v for k, v in self._deadlines.items() if v > now}
+            self._deadlines[key] = now + self.window
+
+    def active(self) -> bool:
+        """当前请求的主体是否仍在写后读主库的窗口期内"""
+        key = self._current.get()
+        if key is None:
+            return False
+        deadline = self._deadlines.get(key)
+        return deadline is not None and deadline > time.monotonic()
@@ -0,0 +1,36 @@
+"""考勤月份统一为yyyymm整数并增加(month, id)复合索引
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+day = sa.table("day", sa.column("month", sa.Integer))
+
+
+def upgrade() -> None:
+    # 旧接口未做格式校验，SQLite等弱类型库中可能存有"2024-01"形式的文本，统一转换为202401
+    month_text = sa.cast(day.c.month, sa.String(16))
+    op.execute(
+        day.update()
+        .where(month_text.like("%-%"))
+        .values(month=sa.cast(sa.func.replace(month_text, "-", ""), sa.Integer))
+    )
+    op.create_index("ix_day_month_id", "day", ["month", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_day_month_id", table_name="day")
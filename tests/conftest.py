@@ -0,0 +1,81 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List
+
+# 导入应用前切换到临时SQLite库，并关闭限流与响应缓存，保证每个请求实际执行的SQL稳定可数
+_tmp_dir = tempfile.mkdtemp(prefix="xzk-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["ACCESS_LOG_FILE"] = os.path.join(_tmp_dir, "access.log")
+os.environ["ACCESS_LOG_CONSOLE"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.security import get_password_hash
+from app.models.role_permission import Permission, Role
+from app.models.user import User
+from config.database import SessionLocal, async_engine, engine
+from config.main import app
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "111111"
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client: TestClient) -> dict:
+    """创建拥有角色管理权限的管理员并登录，返回认证请求头"""
+    db = SessionLocal()
+    db.add_all([
+        Role(name="admin", permissions=[Permission(name="角色管理", code="role:manage")]),
+        User(username=ADMIN_USERNAME, email="admin@example.com",
+             hashed_password=get_password_hash(ADMIN_PASSWORD), role="admin"),
+    ])
+    db.commit()
+    db.close()
+    response = client.post("/api/v1/auth/token", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+@contextmanager
+def _count_statements() -> Iterator[List[str]]:
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def count_statements():
+    """统计代码块内同步、异步引擎实际发送到数据库的SQL语句"""
+    return _count_statements
+
+
+@pytest.fixture
+def warm_auth(client: TestClient, admin_headers: dict):
+    """预热用户状态缓存与权限缓存，使语句计数只包含接口自身的SQL"""
+
+    def warm() -> None:
+        client.get("/api/v1/security/roles/1", headers=admin_headers)
+
+    return warm
@@ -0,0 +1,57 @@
+"""登录接口"""
+
+from sqlalchemy import update
+
+from app.api.endpoints import authapi
+from app.crud import userdao
+from app.models.user import User
+from app.schemas.user import UserUpdate
+from config.database import SessionLocal, async_engine
+from tests.conftest import ADMIN_PASSWORD, ADMIN_USERNAME
+
+
+def test_login_returns_token(client, admin_headers):
+    response = client.post("/api/v1/auth/token", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    assert response.json()["data"]["access_token"]
+
+
+def test_login_validation_error_reported_once(client):
+    response = client.post("/api/v1/auth/token", json={"username": "bob"})
+    body = response.json()
+    assert body["errorCode"] == 400
+    assert [error["field"] for error in body["errors"]] == ["body.password"]
+    assert body["errorMessage"].count("body.password") == 1
+
+
+def test_login_releases_connection_before_password_check(client, admin_headers, monkeypatch):
+    checked_out = []
+    verify = authapi.verify_and_update_password_async
+
+    async def verify_and_record(plain_password, hashed_password):
+        checked_out.append(async_engine.sync_engine.pool.checkedout())
+        return await verify(plain_password, hashed_password)
+
+    monkeypatch.setattr(authapi, "verify_and_update_password_async", verify_and_record)
+    response = client.post("/api/v1/auth/token", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    assert response.json()["success"] is True
+    assert checked_out == [0]
+
+
+def test_current_user_survives_rollback_in_previous_request(client, admin_headers):
+    assert client.post("/api/v1/users/get", headers=admin_headers, json={"user_id": 999}).json()["errorCode"] == 404
+    for _ in range(2):
+        response = client.post("/api/v1/auth/currentUser", headers=admin_headers)
+        assert response.json()["data"]["name"] == ADMIN_USERNAME
+
+
+def test_role_changes_bump_token_version_atomically(client, admin_headers):
+    user_id = client.post("/api/v1/users/create", headers=admin_headers,
+                          json={"username": "frank", "email": "frank@example.com", "password": "123456"}).json()["data"]["id"]
+    db = SessionLocal()
+    db_user = userdao.get_user(db, user_id)
+    # 模拟并发：另一个请求已递增版本号，本会话持有的仍是旧值
+    db.execute(update(User).where(User.id == user_id).values(token_version=User.token_version + 1))
+    userdao.update_user(db, db_user, UserUpdate(role="admin"))
+    db.commit()
+    assert db_user.token_version == 2
+    db.close()
@@ -0,0 +1,17 @@
+"""统一错误响应"""
+
+from app.core.exceptions import FIXED_ERRORS, RENDERED_ERRORS
+
+
+def test_dynamic_messages_do_not_evict_fixed_error_bodies(client, admin_headers):
+    fixed = dict(RENDERED_ERRORS)
+    for i in range(300):
+        response = client.post("/api/v1/users/list", headers=admin_headers, json={"fields": [f"f{i}"]})
+        assert response.json()["errorMessage"] == f"不支持的字段：f{i}"
+    assert RENDERED_ERRORS == fixed
+    assert set(RENDERED_ERRORS) == set(FIXED_ERRORS)
+
+
+def test_fixed_error_uses_rendered_body(client):
+    response = client.get("/api/v1/security/roles", headers={"Authorization": "Bearer invalid"})
+    assert response.content == RENDERED_ERRORS[(401, "无法验证凭据")]
@@ -0,0 +1,34 @@
+"""限流配置与令牌桶"""
+
+import asyncio
+
+import pytest
+
+from app.core.exceptions import BusinessException
+from app.core.ratelimit import MemoryBackend, RateLimiter, parse_limit
+
+
+def test_parse_limit():
+    assert parse_limit("30/60") == (30.0, 0.5)
+    assert parse_limit("5") == (5.0, 5.0)
+
+
+@pytest.mark.parametrize("spec", ["0/60", "5/0", "-1/60", "5/-1", "abc", "5/x", "nan/60", "inf/60"])
+def test_parse_limit_rejects_non_positive_or_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_limit(spec)
+
+
+def test_limiter_rejects_after_capacity():
+    limiter = RateLimiter(backend=MemoryBackend())
+    limit = parse_limit("2/60")
+
+    async def hit():
+        await limiter.hit("test", "key", limit)
+
+    asyncio.run(hit())
+    asyncio.run(hit())
+    with pytest.raises(BusinessException) as exc_info:
+        asyncio.run(hit())
+    assert exc_info.value.code == 429
+    assert exc_info.value.headers["Retry-After"] == "30"
@@ -0,0 +1,93 @@
+"""读写分离：副本为一个从不同步的SQLite文件，读到副本时看不到主库上的数据"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import config.database as database
+from app.crud import userdao
+from app.models.user import User
+from app.schemas.user import UserCreate
+from config.database import Base, RoutingSession, async_engine, engine, on_primary, to_async_url
+from config.pool import ReplicaSelector
+
+
+@pytest.fixture
+def replica(monkeypatch, tmp_path):
+    """把请求会话切换为读写分离会话，返回副本的同步引擎"""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    replica_engine = create_engine(url)
+    Base.metadata.create_all(replica_engine)
+    async_replica_engine = create_async_engine(to_async_url(url))
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(
+        class_=RoutingSession, bind=engine, replicas=ReplicaSelector([replica_engine]),
+        autoflush=False, expire_on_commit=False
+    ))
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(
+        bind=async_engine, sync_session_class=RoutingSession,
+        replicas=ReplicaSelector([async_replica_engine.sync_engine]),
+        autoflush=False, expire_on_commit=False
+    ))
+    monkeypatch.setattr(database.recent_writers, "window", 5)
+    yield replica_engine
+    replica_engine.dispose()
+    asyncio.run(async_replica_engine.dispose())
+
+
+def test_session_routes_reads_to_replica_and_writes_to_primary(replica):
+    with replica.begin() as conn:
+        conn.execute(insert(User), {"username": "ghost", "email": "ghost@example.com", "hashed_password": "x"})
+
+    db = database.SessionLocal()
+    assert userdao.get_user_by_username(db, "ghost") is not None  # 普通读取走副本
+    assert userdao.get_user_by_username(db, "ghost", primary=True) is None
+    assert db.query(User).filter(User.username == "ghost").with_for_update().first() is None
+    db.close()
+
+    db = database.SessionLocal()
+    created = userdao.create_user(db, UserCreate(username="grace", email="grace@example.com", password="123456"), "x")
+    # 同一会话写入后的读取留在主库
+    assert userdao.get_user(db, created.id).username == "grace"
+    assert userdao.get_user_by_username(db, "ghost") is None
+    db.commit()
+    db.close()
+
+    db = database.SessionLocal()
+    assert db.query(User).filter(User.username == "grace").first() is None  # 新会话重新读副本
+    assert on_primary(db.query(User).filter(User.username == "grace")).first() is not None
+    db.close()
+    with replica.connect() as conn:
+        assert conn.execute(User.__table__.select().where(User.username == "grace")).first() is None
+
+
+def test_user_reads_own_writes_across_requests(client, admin_headers, replica, monkeypatch):
+    user_id = client.post("/api/v1/users/create", headers=admin_headers,
+                          json={"username": "heidi", "email": "heidi@example.com", "password": "123456"}).json()["data"]["id"]
+    assert client.post("/api/v1/users/get", headers=admin_headers, json={"user_id": user_id}).json()["success"] is True
+
+    # 写后读主库的窗口关闭后，普通读取落在未同步的副本上
+    monkeypatch.setattr(database.recent_writers, "window", 0)
+    database.recent_writers._deadlines.clear()
+    assert client.post("/api/v1/users/get", headers=admin_headers, json={"user_id": user_id}).json()["errorCode"] == 404
+
+    # 读取后要修改的行加锁读取主库，不受副本延迟影响
+    response = client.post("/api/v1/users/update", headers=admin_headers, json={"user_id": user_id, "email": "heidi2@example.com"})
+    assert response.json()["success"] is True
+
+
+def test_write_path_lookups_read_primary(client, admin_headers, replica, monkeypatch):
+    monkeypatch.setattr(database.recent_writers, "window", 0)
+    permission_id = client.post("/api/v1/security/permissions", headers=admin_headers,
+                                json={"name": "导出", "code": "replica:export"}).json()["id"]
+    # 唯一性预检查读取主库，重复标识直接返回业务错误而不是写入时的完整性错误
+    duplicate = client.post("/api/v1/security/permissions", headers=admin_headers,
+                            json={"name": "导出", "code": "replica:export"})
+    assert duplicate.json()["errorMessage"] == "权限标识已存在"
+
+    assign = f"/api/v1/security/roles/1/permissions/{permission_id}"
+    assert client.post(assign, headers=admin_headers).json()["message"] == "权限分配成功"
+    assert client.post(assign, headers=admin_headers).json()["errorCode"] == 400  # 已分配，不会写入重复关联
+    assert client.delete(assign, headers=admin_headers).json()["message"] == "权限移除成功"
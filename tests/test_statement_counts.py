@@ -0,0 +1,83 @@
+"""写接口与角色查询的SQL语句数回归测试
+
+计数前先预热认证与权限缓存，只统计接口自身的SQL；语句数增加（如恢复commit后的refresh、
+写入前的重复预检查、角色权限退化为逐行加载）即视为回归。
+"""
+
+from app.models.role_permission import Permission, Role
+from config.database import SessionLocal
+
+
+def test_create_user_runs_single_insert(client, admin_headers, warm_auth, count_statements):
+    warm_auth()
+    with count_statements() as statements:
+        response = client.post("/api/v1/users/create", headers=admin_headers,
+                               json={"username": "bob", "email": "bob@example.com", "password": "123456"})
+    assert response.json()["success"] is True
+    assert len(statements) == 1, statements
+
+
+def test_update_user_runs_select_and_update(client, admin_headers, warm_auth, count_statements):
+    user_id = client.post("/api/v1/users/create", headers=admin_headers,
+                          json={"username": "carol", "email": "carol@example.com", "password": "123456"}).json()["data"]["id"]
+    warm_auth()
+    with count_statements() as statements:
+        response = client.post("/api/v1/users/update", headers=admin_headers,
+                               json={"user_id": user_id, "email": "carol2@example.com"})
+    assert response.json()["success"] is True
+    assert len(statements) == 2, statements
+
+
+def test_add_day_runs_single_insert(client, admin_headers, warm_auth, count_statements):
+    warm_auth()
+    with count_statements() as statements:
+        response = client.post("/api/v1/attendance/add", headers=admin_headers, json={"month": "2024-01", "real_day": 20})
+    assert response.json()["success"] is True
+    assert len(statements) == 1, statements
+
+
+def test_create_role_runs_name_check_and_insert(client, admin_headers, warm_auth, count_statements):
+    warm_auth()
+    with count_statements() as statements:
+        response = client.post("/api/v1/security/roles", headers=admin_headers, json={"name": "ops"})
+    assert response.status_code == 201
+    assert len(statements) == 2, statements
+
+
+def test_update_role_runs_select_and_update(client, admin_headers, warm_auth, count_statements):
+    role_id = client.post("/api/v1/security/roles", headers=admin_headers, json={"name": "audit"}).json()["id"]
+    warm_auth()
+    with count_statements() as statements:
+        response = client.put(f"/api/v1/security/roles/{role_id}", headers=admin_headers, json={"description": "审计"})
+    assert response.status_code == 200
+    assert len(statements) == 2, statements
+
+
+def test_list_roles_statement_count_is_independent_of_role_count(client, admin_headers, warm_auth, count_statements):
+    warm_auth()
+    with count_statements() as statements:
+        response = client.get("/api/v1/security/roles?pageSize=1", headers=admin_headers)
+    assert len(response.json()) == 1
+    assert len(statements) == 2, statements
+
+    db = SessionLocal()
+    db.add_all([
+        Role(name=f"team-{i}", permissions=[Permission(name=f"权限{i}", code=f"team:{i}")])
+        for i in range(10)
+    ])
+    db.commit()
+    db.close()
+
+    warm_auth()
+    with count_statements() as statements:
+        response = client.get("/api/v1/security/roles", headers=admin_headers)
+    assert len(response.json()) > 10
+    assert len(statements) == 2, statements
+
+
+def test_get_role_runs_single_select(client, admin_headers, warm_auth, count_statements):
+    warm_auth()
+    with count_statements() as statements:
+        response = client.get("/api/v1/security/roles/1", headers=admin_headers)
+    assert response.json()["permissions"]
+    assert len(statements) == 1, statements
@@ -0,0 +1,34 @@
+"""上传数据解析"""
+
+import asyncio
+
+from app.core.tabular import iter_records
+
+
+def parse(content_type, *chunks):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [item async for item in iter_records(content_type, source())]
+
+    return asyncio.run(collect())
+
+
+def test_csv_quoted_field_may_contain_newlines():
+    records = parse("text/csv", b'month,annual_leave_day\n2024-01,"line1\nli', b'ne2"\n2024-02,3\n')
+    assert records == [
+        (1, {"month": "2024-01", "annual_leave_day": "line1\nline2"}, None),
+        (2, {"month": "2024-02", "annual_leave_day": "3"}, None),
+    ]
+
+
+def test_csv_escaped_quotes_and_blank_lines():
+    records = parse("text/csv", b'month,remark\n\n2024-01,"say ""hi"""\n')
+    assert records == [(1, {"month": "2024-01", "remark": 'say "hi"'}, None)]
+
+
+def test_csv_reports_unterminated_quote_and_column_mismatch():
+    records = parse("text/csv", b'month,real_day\n2024-01\n2024-02,"20\n')
+    assert records == [(1, None, "列数不匹配：应为2列，实际1列"), (2, None, "引号未闭合")]
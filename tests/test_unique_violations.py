@@ -0,0 +1,27 @@
+"""唯一约束冲突到业务提示的映射"""
+
+import pytest
+
+from app.crud.userdao import _unique_key
+
+
+@pytest.mark.parametrize("message, key", [
+    ("(1062, \"Duplicate entry 'users.username@x.com' for key 'users.ix_users_email'\")", "users.ix_users_email"),
+    ("(1062, \"Duplicate entry 'bob' for key 'ix_users_username'\")", "ix_users_username"),
+    ('duplicate key value violates unique constraint "ix_users_email"\n'
+     'DETAIL:  Key (email)=(users.username@x.com) already exists.', "ix_users_email"),
+    ("UNIQUE constraint failed: users.email", "users.email"),
+])
+def test_unique_key_ignores_duplicate_value(message, key):
+    assert _unique_key(message) == key
+
+
+@pytest.mark.parametrize("payload, msg", [
+    ({"username": "dave", "email": "dave2@example.com"}, "用户名已存在"),
+    ({"username": "dave2", "email": "dave@example.com"}, "邮箱已存在"),
+])
+def test_create_duplicate_user_reports_conflicting_field(client, admin_headers, payload, msg):
+    client.post("/api/v1/users/create", headers=admin_headers,
+                json={"username": "dave", "email": "dave@example.com", "password": "123456"})
+    response = client.post("/api/v1/users/create", headers=admin_headers, json={**payload, "password": "123456"})
+    assert response.json()["errorMessage"] == msg
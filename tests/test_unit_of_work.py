@@ -0,0 +1,27 @@
+"""请求级工作单元：提交后的回调失败不影响已提交的写入"""
+
+from app.core.response_cache import response_cache
+from config.database import session_usage
+
+
+def test_cache_invalidation_failure_after_commit_keeps_success(client, admin_headers, monkeypatch):
+    async def unavailable(*namespaces):
+        raise ConnectionError("redis unavailable")
+
+    monkeypatch.setattr(response_cache, "invalidate", unavailable)
+    response = client.post("/api/v1/users/create", headers=admin_headers,
+                           json={"username": "erin", "email": "erin@example.com", "password": "123456"})
+    assert response.json()["success"] is True
+
+    monkeypatch.undo()
+    response = client.post("/api/v1/users/get", headers=admin_headers, json={"user_id": response.json()["data"]["id"]})
+    assert response.json()["data"]["username"] == "erin"
+
+
+def test_requests_rejected_before_session_dependency_count_as_unused(client):
+    before = session_usage.snapshot()
+    client.get("/api/v1/security/roles")  # 未携带令牌，认证依赖在创建会话前拒绝
+    client.get("/not-found")
+    after = session_usage.snapshot()
+    assert after["unused"] - before["unused"] == 2
+    assert after["connected"] == before["connected"]